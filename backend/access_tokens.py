@@ -0,0 +1,87 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Tuple
+
+import jwt
+
+# JWT "typ" header of our access tokens (RFC 9068); anything else is treated as a session token
+ACCESS_TOKEN_TYPE = "at+jwt"
+
+
+class AccessTokenError(Exception):
+    """An access token that must not be accepted; the message is safe to return to the client"""
+
+
+def is_access_token(token: str) -> bool:
+    """Whether a bearer token is one of our access tokens rather than a session token"""
+    if token.count(".") != 2:
+        return False
+    try:
+        return jwt.get_unverified_header(token).get("typ") == ACCESS_TOKEN_TYPE
+    except jwt.InvalidTokenError:
+        return False
+
+
+class AccessTokens:
+    """Short-lived signed access tokens, verified without a session lookup
+
+    Each token carries the user and the id of the session it was minted from;
+    the session stays the refresh anchor. Logging out revokes the session id
+    in the shared RevocationList, which must keep revocations for at least ttl.
+    """
+
+    def __init__(self, revocations, secret: str, ttl: float = 900.0, algorithm: str = "HS256"):
+        self.revocations = revocations
+        self.secret = secret
+        self.ttl = ttl
+        self.algorithm = algorithm
+        self.issued = 0
+        self.verified = 0
+        self.rejected = {"expired": 0, "invalid": 0, "revoked": 0}
+
+    def issue(self, user: Dict[str, Any], session_id: str, session_expires_at: datetime) -> Tuple[str, datetime]:
+        """Mint a token for the user's session; it never outlives the session"""
+        now = datetime.utcnow()
+        expires_at = min(now + timedelta(seconds=self.ttl), session_expires_at)
+        claims = {
+            "sub": user["id"],
+            "sid": session_id,
+            "jti": uuid.uuid4().hex,
+            "iat": now,
+            "exp": expires_at,
+            "user": {
+                "email": user["email"],
+                "name": user["name"],
+                "picture": user.get("picture"),
+                "created_at": user["created_at"].isoformat(),
+            },
+        }
+        self.issued += 1
+        token = jwt.encode(claims, self.secret, algorithm=self.algorithm, headers={"typ": ACCESS_TOKEN_TYPE})
+        return token, expires_at
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Claims of a valid, unrevoked token; raises AccessTokenError otherwise"""
+        try:
+            claims = jwt.decode(
+                token, self.secret, algorithms=[self.algorithm], options={"require": ["exp", "sub", "sid"]}
+            )
+        except jwt.ExpiredSignatureError:
+            self.rejected["expired"] += 1
+            raise AccessTokenError("Access token expired")
+        except jwt.InvalidTokenError:
+            self.rejected["invalid"] += 1
+            raise AccessTokenError("Invalid access token")
+        if claims["sid"] in self.revocations:
+            self.rejected["revoked"] += 1
+            raise AccessTokenError("Session revoked")
+        self.verified += 1
+        return claims
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl": self.ttl,
+            "issued": self.issued,
+            "verified": self.verified,
+            "rejected": dict(self.rejected),
+        }
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Auth dependency benchmark
+
+Compares the original two-query session resolution (sessions.find_one followed
+by users.find_one) with the single $lookup aggregation used by get_current_user.
+The session cache is bypassed so every call measures the cold-cache path.
+
+Requires a reachable MongoDB (MONGO_URL / DB_NAME, as for the server).
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import server  # noqa: E402
+
+BENCH_EMAIL_DOMAIN = "bench.invalid"
+
+async def legacy_lookup(token):
+    """The pre-aggregation get_current_user query pattern"""
+    session = await server.db.sessions.find_one({"session_token": token})
+    if not session:
+        return None
+    return await server.db.users.find_one({"id": session["user_id"]})
+
+async def aggregated_lookup(token):
+    session = await server.repositories.sessions.find_with_user(token)
+    if not session or not session["user"]:
+        return None
+    return session["user"][0]
+
+async def seed(count):
+    users, sessions = [], []
+    for i in range(count):
+        user_id = str(uuid.uuid4())
+        users.append({
+            "id": user_id,
+            "email": f"user{i}@{BENCH_EMAIL_DOMAIN}",
+            "name": f"Bench User {i}",
+            "created_at": datetime.utcnow()
+        })
+        sessions.append({
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "session_token": f"bench-{uuid.uuid4()}",
+            "expires_at": datetime.utcnow() + timedelta(days=1),
+            "created_at": datetime.utcnow()
+        })
+    await server.db.users.insert_many(users)
+    await server.db.sessions.insert_many(sessions)
+    return [s["session_token"] for s in sessions], [u["id"] for u in users]
+
+async def cleanup(user_ids):
+    await server.db.sessions.delete_many({"user_id": {"$in": user_ids}})
+    await server.db.users.delete_many({"id": {"$in": user_ids}})
+
+async def run(lookup, tokens, requests_total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(token):
+        async with semaphore:
+            start = time.perf_counter()
+            user = await lookup(token)
+            latencies.append(time.perf_counter() - start)
+            assert user is not None
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(tokens[i % len(tokens)]) for i in range(requests_total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests_total,
+        "seconds": round(elapsed, 3),
+        "rps": round(requests_total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+
+async def main(args):
+    tokens, user_ids = await seed(args.sessions)
+    try:
+        # Warm up connections for both paths
+        await run(legacy_lookup, tokens, min(200, args.requests), args.concurrency)
+        await run(aggregated_lookup, tokens, min(200, args.requests), args.concurrency)
+
+        for name, lookup in (("two_queries", legacy_lookup), ("lookup_aggregation", aggregated_lookup)):
+            result = await run(lookup, tokens, args.requests, args.concurrency)
+            print(f"{name:>20}: " + ", ".join(f"{k}={v}" for k, v in result.items()))
+    finally:
+        await cleanup(user_ids)
+        server.client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark session resolution in get_current_user')
+    parser.add_argument('--sessions', type=int, default=1000, help='Number of seeded sessions')
+    parser.add_argument('--requests', type=int, default=10000, help='Lookups per variant')
+    parser.add_argument('--concurrency', type=int, default=50, help='Concurrent in-flight lookups')
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Response serialization micro-benchmark
+
+Compares the previous dashboard response path (recursive serialize_mongo_doc,
+then FastAPI's jsonable_encoder, then json.dumps in JSONResponse.render) with
+MongoJSONResponse, which serializes raw Mongo documents with orjson in one pass.
+
+Needs no database: payloads are synthetic documents shaped like the ones
+stored by the API.
+"""
+
+import os
+import sys
+import json
+import uuid
+import timeit
+import argparse
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from responses import MongoJSONResponse  # noqa: E402
+
+def legacy_serialize_mongo_doc(doc):
+    """The removed serialize_mongo_doc helper, kept here as the baseline"""
+    if doc is None:
+        return None
+    if isinstance(doc, list):
+        return [legacy_serialize_mongo_doc(item) for item in doc]
+    if isinstance(doc, dict):
+        result = {}
+        for key, value in doc.items():
+            if isinstance(value, ObjectId):
+                result[key] = str(value)
+            elif isinstance(value, (datetime, list, dict)):
+                result[key] = legacy_serialize_mongo_doc(value)
+            else:
+                result[key] = value
+        return result
+    if isinstance(doc, ObjectId):
+        return str(doc)
+    if isinstance(doc, datetime):
+        return doc.isoformat()
+    return doc
+
+def legacy_render(payload):
+    content = jsonable_encoder(legacy_serialize_mongo_doc(payload))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def make_project(user_id):
+    now = datetime.utcnow()
+    url_check = {
+        "status_code": 200,
+        "accessible": True,
+        "not_modified": False,
+        "method": "HEAD",
+        "etag": '"abc123"',
+        "last_modified": None,
+        "response_time": 123.4,
+        "timings": {"dns_ms": 1.2, "connect_ms": 20.5, "ttfb_ms": 80.1, "total_ms": 123.4, "connection_reused": True},
+        "checked_at": now.isoformat()
+    }
+    return {
+        "_id": ObjectId(),
+        "id": str(uuid.uuid4()),
+        "challenge_id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "title": "Personal Portfolio Website",
+        "description": "A responsive portfolio website showcasing my projects " * 4,
+        "repository_url": "https://github.com/testuser/portfolio",
+        "demo_url": "https://portfolio-demo.example.com",
+        "tech_stack": ["React", "Tailwind CSS", "Node.js", "MongoDB"],
+        "status": "in_progress",
+        "progress_percentage": 40,
+        "created_at": now,
+        "updated_at": now,
+        "last_url_check": now,
+        "url_status": {
+            "repository": {**url_check, "url": "https://github.com/testuser/portfolio"},
+            "demo": {**url_check, "url": "https://portfolio-demo.example.com"}
+        }
+    }
+
+def make_challenge(user_id):
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "title": "100 Days of Code",
+        "description": "Build something every day",
+        "goals": ["Ship daily", "Learn in public", "Finish what I start"],
+        "rules": ["Code at least an hour a day", "Tweet progress"],
+        "duration_days": 100,
+        "start_date": now,
+        "end_date": now,
+        "status": "active",
+        "created_at": now,
+        "updated_at": now
+    }
+
+def make_payload(items):
+    user_id = str(uuid.uuid4())
+    return {
+        "user": {"id": user_id, "email": "bench@example.com", "name": "Bench", "picture": None,
+                 "created_at": datetime.utcnow()},
+        "stats": {"total_challenges": items, "active_challenges": items, "completed_challenges": 0,
+                  "total_projects": items, "completed_projects": 0, "overall_progress": 40.0},
+        "recent_challenges": [make_challenge(user_id) for _ in range(items)],
+        "recent_projects": [make_project(user_id) for _ in range(items)],
+        "tech_stack_distribution": {"React": items, "Tailwind CSS": items, "Node.js": items, "MongoDB": items}
+    }
+
+def main(args):
+    new_response = MongoJSONResponse.__new__(MongoJSONResponse)
+    for items in args.items:
+        payload = make_payload(items)
+        assert json.loads(legacy_render(payload)) == json.loads(new_response.render(payload))
+
+        results = {}
+        for name, render in (("legacy", legacy_render), ("orjson", new_response.render)):
+            runs = timeit.repeat(lambda: render(payload), number=args.number, repeat=args.repeat)
+            results[name] = min(runs) / args.number * 1e6
+
+        print(f"items={items:>5}: legacy={results['legacy']:.1f}us, orjson={results['orjson']:.1f}us, "
+              f"speedup={results['legacy'] / results['orjson']:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark dashboard response serialization')
+    parser.add_argument('--items', type=int, nargs='+', default=[5, 100, 1000],
+                        help='Challenges and projects per payload (the dashboard sends 5 of each)')
+    parser.add_argument('--number', type=int, default=200, help='Renders per timing run')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs; the fastest is reported')
+
+    main(parser.parse_args())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Trusted read path benchmark
+
+Times turning a page of project documents, as read from Mongo, into a response
+body:
+
+- validated: Project(**doc) per document, then FastAPI's response_model
+  handling (validate again, serialize) and JSONResponse.render, as the list
+  routes did before
+- trusted: trusted_response, which shapes the documents without validation
+  and renders them with orjson
+
+Needs no database.
+"""
+
+import os
+import sys
+import json
+import timeit
+import asyncio
+import argparse
+from typing import List
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from server import Project  # noqa: E402
+from projection import trusted_response  # noqa: E402
+from bench_serialization import make_project  # noqa: E402
+
+RESPONSE_FIELD = create_response_field(name="Response_get_challenge_projects", type_=List[Project])
+
+def validated_render(docs):
+    models = [Project(**doc) for doc in docs]
+    content = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=models))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def trusted_render(docs):
+    return trusted_response(Project, docs).body
+
+def main(args):
+    # Documents as the list route reads them: projected to the model's fields
+    docs = []
+    for _ in range(args.projects):
+        doc = make_project("bench-user")
+        doc.pop("_id")
+        docs.append(doc)
+    assert json.loads(validated_render(docs)) == json.loads(trusted_render(docs))
+
+    results = {}
+    for name, render in (("validated", validated_render), ("trusted", trusted_render)):
+        runs = timeit.repeat(lambda: render(docs), number=args.number, repeat=args.repeat)
+        results[name] = min(runs) / args.number * 1000
+
+    print(f"projects={args.projects}: validated={results['validated']:.2f}ms, "
+          f"trusted={results['trusted']:.2f}ms, speedup={results['validated'] / results['trusted']:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the trusted DB read path')
+    parser.add_argument('--projects', type=int, default=1000, help='Projects per list response')
+    parser.add_argument('--number', type=int, default=20, help='Renders per timing run')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs; the fastest is reported')
+
+    main(parser.parse_args())
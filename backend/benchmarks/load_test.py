@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the API
+
+Drives the FastAPI app with a realistic request mix and reports latency
+percentiles and throughput per route as JSON:
+
+- auth_reads: list and detail reads spread over many users' tokens
+- dashboard: dashboard polling that revalidates with If-None-Match
+- writes: project creates and updates
+- mixed: all of the above, weighted like normal traffic
+
+The app is driven in-process through its ASGI interface (default), or over
+HTTP against a uvicorn started by the script (--uvicorn PORT). Data lives in
+a throwaway database on MONGO_URL that is dropped afterwards, in the memory
+storage engine with --storage memory, or in mongomock with --storage
+mongomock (needs mongomock-motor). The last two are in-process only.
+
+Runs are comparable across commits: seeding and request choice are driven
+by --seed, and the output records the git commit and every parameter.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import platform
+import subprocess
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+BENCH_EMAIL_DOMAIN = "bench.invalid"
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    to_ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": to_ms(sum(latencies) / len(latencies)) if latencies else None,
+        "p50_ms": to_ms(percentile(latencies, 50)),
+        "p95_ms": to_ms(percentile(latencies, 95)),
+        "p99_ms": to_ms(percentile(latencies, 99)),
+        "max_ms": to_ms(latencies[-1]) if latencies else None,
+    }
+
+# Virtual user state and operations
+class VirtualUser:
+    def __init__(self, token, challenge_id, project_ids):
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.challenge_id = challenge_id
+        self.project_ids = project_ids
+        self.dashboard_etag = None
+
+async def list_challenges(client, user, rng):
+    return "GET /api/challenges", await client.get("/api/challenges", headers=user.headers)
+
+async def get_challenge(client, user, rng):
+    return ("GET /api/challenges/{challenge_id}",
+            await client.get(f"/api/challenges/{user.challenge_id}", headers=user.headers))
+
+async def list_projects(client, user, rng):
+    return ("GET /api/challenges/{challenge_id}/projects",
+            await client.get(f"/api/challenges/{user.challenge_id}/projects", headers=user.headers))
+
+async def get_project(client, user, rng):
+    return ("GET /api/projects/{project_id}",
+            await client.get(f"/api/projects/{rng.choice(user.project_ids)}", headers=user.headers))
+
+async def poll_dashboard(client, user, rng):
+    headers = dict(user.headers)
+    if user.dashboard_etag:
+        headers["If-None-Match"] = user.dashboard_etag
+    response = await client.get("/api/dashboard", headers=headers)
+    user.dashboard_etag = response.headers.get("ETag", user.dashboard_etag)
+    return "GET /api/dashboard", response
+
+async def create_project(client, user, rng):
+    response = await client.post(
+        f"/api/challenges/{user.challenge_id}/projects",
+        headers=user.headers,
+        json={"title": f"Load test project {rng.randrange(10 ** 6)}", "description": "Created by load_test.py",
+              "tech_stack": rng.sample(["React", "FastAPI", "MongoDB", "Go", "Rust"], 2)}
+    )
+    if response.status_code == 200:
+        user.project_ids.append(response.json()["id"])
+    return "POST /api/challenges/{challenge_id}/projects", response
+
+async def update_project(client, user, rng):
+    return ("PUT /api/projects/{project_id}", await client.put(
+        f"/api/projects/{rng.choice(user.project_ids)}",
+        headers=user.headers,
+        json={"progress_percentage": rng.randrange(101)}
+    ))
+
+# Operations with their relative weights
+MIXES = {
+    "auth_reads": [(4, list_challenges), (2, get_challenge), (3, list_projects), (6, get_project)],
+    "dashboard": [(1, poll_dashboard)],
+    "writes": [(1, create_project), (3, update_project)],
+    "mixed": [
+        (4, list_challenges), (2, get_challenge), (3, list_projects), (6, get_project),
+        (8, poll_dashboard), (1, create_project), (2, update_project)
+    ],
+}
+
+# Storage and targets
+def configure_storage(args):
+    """Point the server module at throwaway storage; must run before it's imported"""
+    os.environ["DB_NAME"] = args.db_name
+    os.environ.setdefault("URL_SWEEP_ENABLED", "false")
+    if args.storage == "memory":
+        os.environ["STORAGE_ENGINE"] = "memory"
+        os.environ.pop("MEMORY_STORE_PATH", None)
+    elif args.storage == "mongomock":
+        import motor.motor_asyncio
+        import mongomock_motor
+        motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+
+async def seed(server, users, projects_per_user, rng):
+    from server import Challenge, Project, Session, User
+
+    virtual_users, users_docs, sessions_docs, docs = [], [], [], defaultdict(list)
+    for i in range(users):
+        user = User(email=f"load{i}@{BENCH_EMAIL_DOMAIN}", name=f"Load User {i}")
+        session = Session(
+            user_id=user.id,
+            session_token=f"load-{uuid.UUID(int=rng.getrandbits(128))}",
+            expires_at=datetime.utcnow() + timedelta(days=1)
+        )
+        challenge = Challenge(user_id=user.id, title=f"Load challenge {i}", description="Seeded by load_test.py",
+                              start_date=datetime.utcnow())
+        project_list = [
+            Project(challenge_id=challenge.id, user_id=user.id, title=f"Seeded project {j}",
+                    description="Seeded by load_test.py", tech_stack=["React", "FastAPI"])
+            for j in range(projects_per_user)
+        ]
+        users_docs.append(user.dict())
+        sessions_docs.append(session.dict())
+        docs["challenges"].append(challenge.dict())
+        docs["projects"].extend(project.dict() for project in project_list)
+        virtual_users.append(VirtualUser(session.session_token, challenge.id, [p.id for p in project_list]))
+
+    repositories = server.repositories
+    for user_doc, session_doc in zip(users_docs, sessions_docs):
+        await repositories.users.upsert_by_email(user_doc)
+        await repositories.sessions.upsert_by_token(session_doc)
+    for name, collection_docs in docs.items():
+        if collection_docs:
+            await getattr(repositories, name).insert_many(collection_docs)
+    await server.user_stats.rebuild()
+    return virtual_users
+
+async def wait_for_health(base_url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                if (await client.get("/api/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"uvicorn did not become healthy at {base_url}")
+            await asyncio.sleep(0.2)
+
+# Load generation
+async def drive(client, virtual_users, operations, total_requests, concurrency, rng, record):
+    population, weights = zip(*((op, weight) for weight, op in operations))
+    remaining = total_requests
+
+    async def worker(index):
+        nonlocal remaining
+        worker_rng = random.Random(rng.random())
+        while remaining > 0:
+            remaining -= 1
+            user = virtual_users[worker_rng.randrange(len(virtual_users))]
+            operation = worker_rng.choices(population, weights)[0]
+            started = time.perf_counter()
+            try:
+                route, response = await operation(client, user, worker_rng)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                route, ok = operation.__name__, False
+            if record:
+                record(route, time.perf_counter() - started, ok)
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+async def main(args):
+    configure_storage(args)
+    import server
+
+    rng = random.Random(args.seed)
+    uvicorn_process = None
+    await server.app.router.startup()
+    try:
+        virtual_users = await seed(server, args.users, args.projects_per_user, rng)
+
+        if args.uvicorn:
+            base_url = f"http://127.0.0.1:{args.uvicorn}"
+            uvicorn_process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "server:app", "--port", str(args.uvicorn),
+                 "--log-level", "warning", "--no-access-log"],
+                cwd=BACKEND_DIR, env=os.environ.copy()
+            )
+            await wait_for_health(base_url)
+            client = httpx.AsyncClient(base_url=base_url, timeout=30.0,
+                                       limits=httpx.Limits(max_connections=args.concurrency))
+        else:
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app),
+                                       base_url="http://loadtest", timeout=30.0)
+
+        latencies, errors = defaultdict(list), defaultdict(int)
+
+        def record(route, seconds, ok):
+            latencies[route].append(seconds)
+            if not ok:
+                errors[route] += 1
+
+        async with client:
+            operations = MIXES[args.mix]
+            await drive(client, virtual_users, operations, args.warmup, args.concurrency, rng, None)
+            started = time.perf_counter()
+            await drive(client, virtual_users, operations, args.requests, args.concurrency, rng, record)
+            elapsed = time.perf_counter() - started
+
+        all_latencies = [seconds for route_latencies in latencies.values() for seconds in route_latencies]
+        return {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "target": f"uvicorn:{args.uvicorn}" if args.uvicorn else "in-process",
+                **{key: value for key, value in vars(args).items() if key not in ("output", "uvicorn")},
+            },
+            "total": {**summarize(all_latencies, sum(errors.values()), elapsed), "seconds": round(elapsed, 3)},
+            "routes": {
+                route: summarize(route_latencies, errors[route], elapsed)
+                for route, route_latencies in sorted(latencies.items())
+            },
+        }
+    finally:
+        if uvicorn_process is not None:
+            uvicorn_process.terminate()
+            uvicorn_process.wait()
+        if args.storage == "mongo":
+            await server.client.drop_database(args.db_name)
+        await server.app.router.shutdown()
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load test the API and report per-route latency as JSON')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='mixed', help='Request mix to run')
+    parser.add_argument('--requests', type=int, default=5000, help='Measured requests')
+    parser.add_argument('--warmup', type=int, default=500, help='Unmeasured requests sent first')
+    parser.add_argument('--concurrency', type=int, default=50, help='Concurrent virtual users')
+    parser.add_argument('--users', type=int, default=200, help='Seeded users, each with a session and challenge')
+    parser.add_argument('--projects-per-user', type=int, default=10, help='Seeded projects per user')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for data and request choice')
+    parser.add_argument('--storage', choices=['memory', 'mongo', 'mongomock'], default='mongo',
+                        help='mongo: throwaway database on MONGO_URL; memory: the memory storage engine; '
+                             'mongomock: Mongo emulated in memory. Only mongo works with --uvicorn')
+    parser.add_argument('--db-name', default=f"loadtest_{uuid.uuid4().hex[:8]}", help='Throwaway database name')
+    parser.add_argument('--uvicorn', type=int, metavar='PORT', help='Serve the app with uvicorn on PORT and load it over HTTP')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    if args.uvicorn and args.storage != 'mongo':
+        parser.error('--uvicorn needs --storage mongo: the server process must see the seeded data')
+
+    report = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,109 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Set
+
+
+class TTLCache:
+    """Bounded in-process LRU cache with a per-entry time-to-live"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires = entry
+        if expires <= time.monotonic():
+            self.pop(key)
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            self.pop(key)
+            return
+
+        if key in self._data:
+            self._on_evict(key, self._data[key][0])
+            self._data.move_to_end(key)
+        self._data[key] = (value, time.monotonic() + ttl)
+
+        while len(self._data) > self.maxsize:
+            oldest, (value, _) = self._data.popitem(last=False)
+            self._on_evict(oldest, value)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        self._on_evict(key, entry[0])
+        return entry[0]
+
+    def clear(self) -> None:
+        for key in list(self._data):
+            self.pop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _on_evict(self, key: Hashable, value: Any) -> None:
+        """Hook for subclasses that keep secondary indexes"""
+
+
+class CachedSession(NamedTuple):
+    user: Any
+    session_id: str
+
+
+class SessionCache(TTLCache):
+    """session_token -> CachedSession cache that can also be invalidated per user"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        super().set(key, value, ttl)
+        if key in self._data:
+            self._tokens_by_user.setdefault(value.user.id, set()).add(key)
+
+    def invalidate_user(self, user_id: str) -> None:
+        for token in list(self._tokens_by_user.get(user_id, ())):
+            self.pop(token)
+
+    def _on_evict(self, key: Hashable, value: Any) -> None:
+        tokens = self._tokens_by_user.get(value.user.id)
+        if tokens is not None:
+            tokens.discard(key)
+            if not tokens:
+                del self._tokens_by_user[value.user.id]
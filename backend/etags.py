@@ -0,0 +1,50 @@
+import hashlib
+from typing import Dict, Iterable, Optional
+
+from pymongo import UpdateOne
+
+
+class NotModified(Exception):
+    """Raised before any heavy work when the client's cached copy is current"""
+
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b("\x1f".join(str(part) for part in parts).encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    # Let clients keep a copy but revalidate it on every use
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+class UserVersions:
+    """Per-user counter bumped on every write to that user's challenges or projects"""
+
+    def __init__(self, db):
+        self.collection = db.user_versions
+
+    async def get(self, user_id: str) -> int:
+        doc = await self.collection.find_one({"user_id": user_id}, {"_id": 0, "version": 1})
+        return doc["version"] if doc else 0
+
+    async def bump(self, user_id: str) -> None:
+        await self.collection.update_one({"user_id": user_id}, {"$inc": {"version": 1}}, upsert=True)
+
+    async def bump_many(self, user_ids: Iterable[str]) -> None:
+        requests = [
+            UpdateOne({"user_id": user_id}, {"$inc": {"version": 1}}, upsert=True)
+            for user_id in set(user_ids)
+        ]
+        if requests:
+            await self.collection.bulk_write(requests, ordered=False)
@@ -0,0 +1,79 @@
+import logging
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Every index the API relies on, by collection
+INDEXES: Dict[str, List[IndexModel]] = {
+    "sessions": [
+        IndexModel([("session_token", ASCENDING)], name="session_token_unique", unique=True),
+        # Mongo removes sessions itself once expires_at has passed
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        # Logout with an access token, which carries the session id rather than its token
+        IndexModel([("id", ASCENDING)], name="id"),
+    ],
+    "revoked_sessions": [
+        IndexModel([("session_id", ASCENDING)], name="session_id_unique", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "challenges": [
+        IndexModel([("id", ASCENDING), ("user_id", ASCENDING)], name="id_user_id"),
+        # Keyset pagination on (created_at, id) and the dashboard's recent items
+        IndexModel(
+            [("user_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)],
+            name="user_id_created_at_id"
+        ),
+    ],
+    "projects": [
+        IndexModel([("id", ASCENDING), ("user_id", ASCENDING)], name="id_user_id"),
+        IndexModel(
+            [("user_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)],
+            name="user_id_created_at_id"
+        ),
+        IndexModel(
+            [("challenge_id", ASCENDING), ("user_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)],
+            name="challenge_id_user_id_created_at_id"
+        ),
+        IndexModel([("last_url_check", ASCENDING)], name="last_url_check"),
+    ],
+    "user_stats": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    "user_versions": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+}
+
+
+async def ensure_indexes(db) -> None:
+    """Create any missing indexes; a failing index is logged rather than fatal"""
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            try:
+                await db[collection].create_indexes([index])
+            except PyMongoError as e:
+                logger.error("Could not create index %s.%s: %s", collection, index.document["name"], e)
+
+
+async def index_usage(db) -> Dict[str, List[Dict[str, Any]]]:
+    """$indexStats for every managed collection"""
+    usage = {}
+    for collection in INDEXES:
+        stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(None)
+        usage[collection] = [
+            {
+                "name": stat["name"],
+                "key": stat["key"],
+                "ops": stat["accesses"]["ops"],
+                "since": stat["accesses"]["since"],
+            }
+            for stat in stats
+        ]
+    return usage
@@ -0,0 +1,536 @@
+"""In-memory storage engine
+
+Keeps every collection in dicts with the secondary indexes the routes need,
+so requests are served without a database round trip. Meant for single-node
+deployments and for benchmarking the request path without MongoDB.
+
+Persistence is optional: given a path, every write is appended to a log
+there, and the log is periodically folded into a snapshot beside it. Start-up
+loads the snapshot and replays the log; a torn last line from a crash is
+ignored.
+"""
+
+import asyncio
+import logging
+import os
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+from pymongo.errors import DuplicateKeyError
+
+from pagination import ListSort, decode_cursor, encode_cursor
+from repositories import URL_CHECK_FIELDS
+from user_stats import add_counters, challenge_counters, empty_stats, present_stats, project_counters
+
+logger = logging.getLogger(__name__)
+
+
+def _clone(value: Any) -> Any:
+    """Copy a document for storage the way Mongo would see it: enums become their values"""
+    if isinstance(value, dict):
+        return {key: _clone(item) for key, item in value.items() if key != "_id"}
+    if isinstance(value, (list, tuple)):
+        return [_clone(item) for item in value]
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply an inclusion projection; the copy is shallow, stored documents are never mutated"""
+    fields = [name for name, include in (projection or {}).items() if include and name != "_id"]
+    if not fields:
+        return dict(doc)
+    return {name: doc[name] for name in fields if name in doc}
+
+
+def _matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    return all(doc.get(field) == value for field, value in query.items())
+
+
+def _has_url(doc: Dict[str, Any]) -> bool:
+    return bool(doc.get("repository_url") or doc.get("demo_url"))
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _dumps(record: Dict[str, Any]) -> bytes:
+    return orjson.dumps(record, default=_encode, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+def _revive(value: Any) -> Any:
+    if isinstance(value, dict):
+        if len(value) == 1 and "$date" in value:
+            return datetime.fromisoformat(value["$date"])
+        return {key: _revive(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_revive(item) for item in value]
+    return value
+
+
+class MemoryStore:
+    """Named dict collections with an optional append-only log and snapshot"""
+
+    def __init__(self, path: Optional[str] = None, compact_every: int = 100000, fsync: bool = False):
+        self.path = path
+        self.snapshot_path = f"{path}.snapshot" if path else None
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.collections: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        self._log = None
+        self._log_records = 0
+
+    def load(self) -> None:
+        if not self.path:
+            return
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "rb") as f:
+                for name, docs in orjson.loads(f.read()).items():
+                    # Update in place: repositories hold references to these dicts
+                    self.collections[name].update((key, _revive(doc)) for key, doc in docs.items())
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line in f:
+                    try:
+                        record = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        logger.warning("Ignoring torn record at the end of %s", self.path)
+                        break
+                    if record["op"] == "put":
+                        self.collections[record["c"]][record["k"]] = _revive(record["d"])
+                    else:
+                        self.collections[record["c"]].pop(record["k"], None)
+        # Fold the replayed log into a fresh snapshot; appending after a torn record would corrupt the next one
+        self.snapshot()
+
+    def put(self, name: str, key: str, doc: Dict[str, Any]) -> None:
+        self.collections[name][key] = doc
+        self._append({"op": "put", "c": name, "k": key, "d": doc})
+
+    def delete(self, name: str, key: str) -> None:
+        if self.collections[name].pop(key, None) is not None:
+            self._append({"op": "delete", "c": name, "k": key})
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        if self._log is None:
+            return
+        self._log.write(_dumps(record) + b"\n")
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self._log_records += 1
+        if self._log_records >= self.compact_every:
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        """Write every collection to the snapshot file, then start an empty log
+
+        Replaying a log over a snapshot that already contains it is harmless
+        (records are whole documents), so a crash between the two steps loses
+        nothing.
+        """
+        if not self.path:
+            return
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_dumps(dict(self.collections)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        if self._log is not None:
+            self._log.close()
+        self._log = open(self.path, "wb")
+        self._log_records = 0
+
+    def close(self) -> None:
+        if self._log is not None:
+            self.snapshot()
+            self._log.close()
+            self._log = None
+
+
+class _OrderIndex:
+    """(created_at, id) keys of documents grouped by the values of some fields, kept sorted"""
+
+    def __init__(self, fields: Tuple[str, ...]):
+        self.fields = fields
+        self.groups: Dict[Tuple[Any, ...], List[Tuple[datetime, str]]] = defaultdict(list)
+
+    def group_key(self, doc: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(doc.get(field) for field in self.fields)
+
+    def add(self, doc: Dict[str, Any]) -> None:
+        insort(self.groups[self.group_key(doc)], (doc["created_at"], doc["id"]))
+
+    def remove(self, doc: Dict[str, Any]) -> None:
+        key = self.group_key(doc)
+        keys = self.groups[key]
+        position = bisect_left(keys, (doc["created_at"], doc["id"]))
+        if position < len(keys) and keys[position] == (doc["created_at"], doc["id"]):
+            del keys[position]
+        if not keys:
+            del self.groups[key]
+
+
+class MemoryUserRepository:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+        self.docs = store.collections["users"]
+        self._by_email: Dict[str, str] = {}
+
+    def reindex(self) -> None:
+        self._by_email = {doc["email"]: user_id for user_id, doc in self.docs.items()}
+
+    async def upsert_by_email(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        user_id = self._by_email.get(user["email"])
+        if user_id is None:
+            user_id = user["id"]
+            self.store.put("users", user_id, _clone(user))
+            self._by_email[user["email"]] = user_id
+        return dict(self.docs[user_id])
+
+
+class MemorySessionRepository:
+    def __init__(self, store: MemoryStore, users: MemoryUserRepository):
+        self.store = store
+        self.docs = store.collections["sessions"]
+        self.users = users
+        self._token_by_id: Dict[str, str] = {}
+
+    def reindex(self) -> None:
+        self._token_by_id = {session["id"]: token for token, session in self.docs.items()}
+
+    async def upsert_by_token(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        token = session["session_token"]
+        if token not in self.docs:
+            self.store.put("sessions", token, _clone(session))
+            self._token_by_id[session["id"]] = token
+        return dict(self.docs[token])
+
+    async def find_with_user(self, token: str) -> Optional[Dict[str, Any]]:
+        session = self.docs.get(token)
+        if session is None:
+            return None
+        user = self.users.docs.get(session["user_id"])
+        return {**session, "user": [dict(user)] if user else []}
+
+    async def delete(self, token: str) -> Optional[Dict[str, Any]]:
+        session = self.docs.get(token)
+        if session is None:
+            return None
+        self._token_by_id.pop(session["id"], None)
+        self.store.delete("sessions", token)
+        return dict(session)
+
+    async def delete_by_id(self, session_id: str) -> Optional[Dict[str, Any]]:
+        token = self._token_by_id.get(session_id)
+        return await self.delete(token) if token is not None else None
+
+    async def tokens(self, now: datetime) -> AsyncIterator[str]:
+        for token, session in list(self.docs.items()):
+            if session["expires_at"] > now:
+                yield token
+
+    def purge_expired(self, now: datetime) -> int:
+        """What the TTL index does for the Mongo engine"""
+        expired = [token for token, session in self.docs.items() if session["expires_at"] < now]
+        for token in expired:
+            self._token_by_id.pop(self.docs[token]["id"], None)
+            self.store.delete("sessions", token)
+        return len(expired)
+
+
+class MemoryRevocationRepository:
+    """Revoked session ids, dropped once expired like the TTL index does for the Mongo engine"""
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+        self.docs = store.collections["revoked_sessions"]
+
+    async def add(self, session_id: str, expires_at: datetime) -> None:
+        self.store.put("revoked_sessions", session_id, {"session_id": session_id, "expires_at": expires_at})
+
+    async def active(self, now: datetime) -> Dict[str, datetime]:
+        for session_id in [key for key, doc in self.docs.items() if doc["expires_at"] <= now]:
+            self.store.delete("revoked_sessions", session_id)
+        return {session_id: doc["expires_at"] for session_id, doc in self.docs.items()}
+
+
+class MemoryOwnedRepository:
+    """Documents owned by a user, indexed by user and listed by (created_at, id)"""
+
+    index_fields: Tuple[Tuple[str, ...], ...] = (("user_id",),)
+
+    def __init__(self, store: MemoryStore, name: str):
+        self.store = store
+        self.name = name
+        self.docs = store.collections[name]
+        self.indexes = [_OrderIndex(fields) for fields in self.index_fields]
+
+    def reindex(self) -> None:
+        self.indexes = [_OrderIndex(fields) for fields in self.index_fields]
+        for doc in self.docs.values():
+            self._index(doc)
+
+    def _index(self, doc: Dict[str, Any]) -> None:
+        for index in self.indexes:
+            index.add(doc)
+
+    def _unindex(self, doc: Dict[str, Any]) -> None:
+        for index in self.indexes:
+            index.remove(doc)
+
+    def _owned(self, doc_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        doc = self.docs.get(doc_id)
+        return doc if doc is not None and doc["user_id"] == user_id else None
+
+    def _ordered_keys(self, query: Dict[str, Any]) -> Tuple[List[Tuple[datetime, str]], Dict[str, Any]]:
+        """The sorted keys of the most selective index for query, and the fields still to filter on"""
+        for index in sorted(self.indexes, key=lambda index: -len(index.fields)):
+            if all(field in query for field in index.fields):
+                keys = index.groups.get(tuple(query[field] for field in index.fields), [])
+                return keys, {k: v for k, v in query.items() if k not in index.fields}
+        raise ValueError(f"No index on {self.name} covers {sorted(query)}")
+
+    async def insert(self, doc: Dict[str, Any]) -> None:
+        if doc["id"] in self.docs:
+            raise DuplicateKeyError(f"Duplicate id in {self.name}")
+        doc = _clone(doc)
+        self.store.put(self.name, doc["id"], doc)
+        self._index(doc)
+
+    async def insert_many(self, docs: List[Dict[str, Any]]) -> Dict[int, str]:
+        errors = {}
+        for position, doc in enumerate(docs):
+            try:
+                await self.insert(doc)
+            except DuplicateKeyError as e:
+                errors[position] = str(e)
+        return errors
+
+    async def get(self, doc_id: str, user_id: str, projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        doc = self._owned(doc_id, user_id)
+        return _project(doc, projection) if doc is not None else None
+
+    async def exists(self, doc_id: str, user_id: str) -> bool:
+        return self._owned(doc_id, user_id) is not None
+
+    async def page(
+        self,
+        query: Dict[str, Any],
+        limit: int,
+        cursor: Optional[str] = None,
+        sort: ListSort = ListSort.OLDEST_FIRST,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        keys, rest = self._ordered_keys(query)
+        if sort == ListSort.OLDEST_FIRST:
+            start = bisect_right(keys, decode_cursor(cursor)) if cursor else 0
+            candidates: Iterable[Tuple[datetime, str]] = (keys[i] for i in range(start, len(keys)))
+        else:
+            end = bisect_left(keys, decode_cursor(cursor)) if cursor else len(keys)
+            candidates = (keys[i] for i in range(end - 1, -1, -1))
+
+        docs = []
+        for _, doc_id in candidates:
+            doc = self.docs[doc_id]
+            if _matches(doc, rest):
+                docs.append(doc)
+                if len(docs) > limit:
+                    break
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1])
+        return [_project(doc, projection) for doc in docs], next_cursor
+
+    async def recent(self, user_id: str, limit: int, projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        keys, _ = self._ordered_keys({"user_id": user_id})
+        return [_project(self.docs[doc_id], projection) for _, doc_id in reversed(keys[-limit:])]
+
+    async def update(
+        self,
+        doc_id: str,
+        user_id: str,
+        update_data: Dict[str, Any],
+        query: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        before = self._owned(doc_id, user_id)
+        if before is None or not _matches(before, query or {}):
+            return None
+        after = {**before, **_clone(update_data)}
+        self._unindex(before)
+        self.store.put(self.name, doc_id, after)
+        self._index(after)
+        return dict(before)
+
+    async def delete(self, doc_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        doc = self._owned(doc_id, user_id)
+        if doc is None:
+            return None
+        self._unindex(doc)
+        self.store.delete(self.name, doc_id)
+        return dict(doc)
+
+    async def stream(self, user_id: str, batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+        keys, _ = self._ordered_keys({"user_id": user_id})
+        for position, (_, doc_id) in enumerate(list(keys)):
+            if position and position % batch_size == 0:
+                # Let other requests run between batches, like a cursor's getMore would
+                await asyncio.sleep(0)
+            doc = self.docs.get(doc_id)
+            if doc is not None:
+                yield dict(doc)
+
+    def all_for_user(self, user_id: str) -> List[Dict[str, Any]]:
+        keys, _ = self._ordered_keys({"user_id": user_id})
+        return [self.docs[doc_id] for _, doc_id in keys]
+
+
+class MemoryChallengeRepository(MemoryOwnedRepository):
+    pass
+
+
+class MemoryProjectRepository(MemoryOwnedRepository):
+    index_fields = (("user_id",), ("user_id", "challenge_id"))
+
+    def __init__(self, store: MemoryStore, name: str):
+        super().__init__(store, name)
+        # (last_url_check, id) of projects with a URL, sorted; never-checked ones sort first, as nulls do in Mongo
+        self._by_url_check: List[Tuple[datetime, str]] = []
+
+    @staticmethod
+    def _url_check_key(doc: Dict[str, Any]) -> Tuple[datetime, str]:
+        return doc.get("last_url_check") or datetime.min, doc["id"]
+
+    def reindex(self) -> None:
+        self._by_url_check = []
+        super().reindex()
+
+    def _index(self, doc: Dict[str, Any]) -> None:
+        super()._index(doc)
+        if _has_url(doc):
+            insort(self._by_url_check, self._url_check_key(doc))
+
+    def _unindex(self, doc: Dict[str, Any]) -> None:
+        super()._unindex(doc)
+        if _has_url(doc):
+            key = self._url_check_key(doc)
+            position = bisect_left(self._by_url_check, key)
+            if position < len(self._by_url_check) and self._by_url_check[position] == key:
+                del self._by_url_check[position]
+
+    def _for_url_check(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: doc[field] for field in URL_CHECK_FIELDS if field in doc}
+
+    async def stale_for_url_check(self, cutoff: datetime, limit: int) -> List[Dict[str, Any]]:
+        end = min(bisect_left(self._by_url_check, (cutoff, "")), limit)
+        return [self._for_url_check(self.docs[doc_id]) for _, doc_id in self._by_url_check[:end]]
+
+    async def for_url_check(self, project_ids: List[str]) -> List[Dict[str, Any]]:
+        return [
+            self._for_url_check(self.docs[project_id]) for project_id in project_ids if project_id in self.docs
+        ]
+
+    async def set_url_statuses(self, statuses: List[Tuple[str, Dict[str, Any]]], checked_at: datetime) -> None:
+        for project_id, url_status in statuses:
+            doc = self.docs.get(project_id)
+            if doc is not None:
+                checked = {
+                    **doc, "url_status": _clone(url_status), "last_url_check": checked_at, "updated_at": checked_at
+                }
+                self._unindex(doc)
+                self.store.put(self.name, project_id, checked)
+                self._index(checked)
+
+
+class MemoryUserStats:
+    """UserStats for the memory engine: kept in memory, rebuilt from the documents on first read"""
+
+    def __init__(self, challenges: MemoryChallengeRepository, projects: MemoryProjectRepository):
+        self.challenges = challenges
+        self.projects = projects
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    async def apply(self, user_id: str, before: Counter, after: Counter) -> None:
+        stats = self._stats.get(user_id)
+        if stats is not None:
+            delta = Counter(after)
+            delta.subtract(before)
+            add_counters(stats, delta)
+            stats["updated_at"] = datetime.utcnow()
+
+    async def get(self, user_id: str) -> Dict[str, Any]:
+        if user_id not in self._stats:
+            await self.rebuild(user_id)
+        stats = self._stats[user_id]
+        return present_stats({**stats, "challenges": dict(stats["challenges"]), "projects": dict(stats["projects"])})
+
+    async def rebuild(self, user_id: Optional[str] = None) -> List[str]:
+        user_ids = [user_id] if user_id else {
+            doc["user_id"] for docs in (self.challenges.docs, self.projects.docs) for doc in docs.values()
+        }
+        changed = set(user_ids)
+        if not user_id:
+            changed.update(self._stats)
+            self._stats.clear()
+        for uid in user_ids:
+            counters = Counter()
+            for doc in self.challenges.all_for_user(uid):
+                counters.update(challenge_counters(doc))
+            for doc in self.projects.all_for_user(uid):
+                counters.update(project_counters(doc))
+            self._stats[uid] = {**add_counters(empty_stats(uid), counters), "updated_at": datetime.utcnow()}
+        return sorted(changed)
+
+
+class MemoryUserVersions:
+    """UserVersions for the memory engine; persisted so ETags don't repeat after a restart"""
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+        self.docs = store.collections["user_versions"]
+
+    async def get(self, user_id: str) -> int:
+        doc = self.docs.get(user_id)
+        return doc["version"] if doc else 0
+
+    async def bump(self, user_id: str) -> None:
+        self.store.put("user_versions", user_id, {"user_id": user_id, "version": await self.get(user_id) + 1})
+
+    async def bump_many(self, user_ids: Iterable[str]) -> None:
+        for user_id in set(user_ids):
+            await self.bump(user_id)
+
+
+class MemoryRepositories:
+    """The in-memory storage engine"""
+
+    def __init__(self, path: Optional[str] = None, compact_every: int = 100000, fsync: bool = False):
+        self.db = None
+        self.store = MemoryStore(path, compact_every=compact_every, fsync=fsync)
+        self.users = MemoryUserRepository(self.store)
+        self.sessions = MemorySessionRepository(self.store, self.users)
+        self.revocations = MemoryRevocationRepository(self.store)
+        self.challenges = MemoryChallengeRepository(self.store, "challenges")
+        self.projects = MemoryProjectRepository(self.store, "projects")
+        self.user_stats = MemoryUserStats(self.challenges, self.projects)
+        self.user_versions = MemoryUserVersions(self.store)
+
+    async def start(self) -> None:
+        self.store.load()
+        self.sessions.purge_expired(datetime.utcnow())
+        for repository in (self.users, self.sessions, self.challenges, self.projects):
+            repository.reindex()
+
+    async def close(self) -> None:
+        self.store.close()
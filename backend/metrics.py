@@ -0,0 +1,145 @@
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from starlette.responses import Response
+
+# A registry of our own, so re-importing the app (tests, reload) never registers twice
+REGISTRY = CollectorRegistry()
+
+# Requests that matched no route share one label value to keep cardinality bounded
+UNMATCHED_ROUTE = "<unmatched>"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ("method", "route", "status"), registry=REGISTRY
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being handled", ("method",), registry=REGISTRY
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, until the last body chunk is sent",
+    ("method", "route", "status"), buckets=LATENCY_BUCKETS, registry=REGISTRY
+)
+BACKGROUND_TASK_DURATION = Histogram(
+    "background_task_duration_seconds", "Background task run time", ("task", "outcome"),
+    buckets=LATENCY_BUCKETS + (30.0, 60.0, 300.0), registry=REGISTRY
+)
+URL_CHECKS = Counter(
+    "url_checks_total", "Project URL checks by outcome", ("outcome", "method"), registry=REGISTRY
+)
+URL_CHECK_DURATION = Histogram(
+    "url_check_duration_seconds", "Project URL check latency", ("outcome",),
+    buckets=LATENCY_BUCKETS, registry=REGISTRY
+)
+
+AUTH_TOKEN_REJECTIONS = Counter(
+    "auth_token_rejections_total", "Bearer tokens rejected, by the layer that rejected them", ("reason",),
+    registry=REGISTRY
+)
+AUTH_TOKEN_BLOOM_FALSE_POSITIVES = Counter(
+    "auth_token_bloom_false_positives_total", "Unknown tokens the Bloom filter let through to a lookup",
+    registry=REGISTRY
+)
+AUTH_TOKEN_BLOOM_ESTIMATED_FP_RATE = Gauge(
+    "auth_token_bloom_estimated_false_positive_rate", "Bloom filter false-positive rate at its current fill",
+    registry=REGISTRY
+)
+
+
+class PrometheusMiddleware:
+    """Pure ASGI middleware recording count, in-flight and latency per route template
+
+    The route template (e.g. /api/projects/{project_id}) is read from the scope
+    after routing, so path parameters never become label values.
+    """
+
+    def __init__(self, app, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        finished = None
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+
+        async def send_wrapper(message):
+            nonlocal status_code, finished
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            # Background tasks run after the last body chunk; they're not request latency
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished = time.perf_counter()
+                in_progress.dec()
+
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if finished is None:
+                finished = time.perf_counter()
+                in_progress.dec()
+            duration = finished - started
+            route = scope.get("route")
+            labels = (method, route.path if route is not None else UNMATCHED_ROUTE, str(status_code))
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_REQUEST_DURATION.labels(*labels).observe(duration)
+
+
+def track_background_task(name: str) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """Record the run time of an async background task, split by success or error"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await func(*args, **kwargs)
+                outcome = "success"
+                return result
+            finally:
+                BACKGROUND_TASK_DURATION.labels(name, outcome).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def url_check_outcome(result: Dict[str, Any]) -> str:
+    if result.get("error"):
+        return "error"
+    if result.get("not_modified"):
+        return "not_modified"
+    return "accessible" if result.get("accessible") else "inaccessible"
+
+
+def record_url_check(result: Dict[str, Any]) -> None:
+    """URLMonitor result hook"""
+    outcome = url_check_outcome(result)
+    URL_CHECKS.labels(outcome, result.get("method") or "none").inc()
+    URL_CHECK_DURATION.labels(outcome).observe(result["response_time"] / 1000)
+
+
+def record_token_rejection(reason: str, false_positive: bool) -> None:
+    """TokenFilter rejection hook"""
+    AUTH_TOKEN_REJECTIONS.labels(reason).inc()
+    if false_positive:
+        AUTH_TOKEN_BLOOM_FALSE_POSITIVES.inc()
+
+
+def track_token_filter(token_filter) -> None:
+    """Read the Bloom filter's estimated false-positive rate at scrape time"""
+    AUTH_TOKEN_BLOOM_ESTIMATED_FP_RATE.set_function(
+        lambda: token_filter.bloom.estimated_error_rate() if token_filter.bloom is not None else 0.0
+    )
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pymongo import ASCENDING, DESCENDING
+
+
+class ListSort(str, Enum):
+    OLDEST_FIRST = "created_at"
+    NEWEST_FIRST = "-created_at"
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    payload = json.dumps({"c": doc["created_at"].isoformat(), "i": doc["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), payload["i"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def paginate(
+    collection,
+    query: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    sort: ListSort = ListSort.OLDEST_FIRST,
+    projection: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Keyset pagination over (created_at, id)
+
+    Returns one page of documents and the cursor for the next page, or None
+    on the last page. Each page is a bounded index range scan, so deep pages
+    cost the same as the first.
+    """
+    direction = ASCENDING if sort == ListSort.OLDEST_FIRST else DESCENDING
+    if cursor:
+        created_at, doc_id = decode_cursor(cursor)
+        op = "$gt" if direction == ASCENDING else "$lt"
+        query = {
+            **query,
+            "$or": [
+                {"created_at": {op: created_at}},
+                {"created_at": created_at, "id": {op: doc_id}}
+            ]
+        }
+
+    docs = await collection.find(query, projection).sort(
+        [("created_at", direction), ("id", direction)]
+    ).limit(limit + 1).to_list(limit + 1)
+
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1])
+    return docs, None
@@ -0,0 +1,71 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from responses import MongoJSONResponse
+
+
+def parse_fields(fields: Optional[str], *models: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """Parse a ?fields=a,b,c selector, rejecting names none of the models define
+
+    "id" is always included. Returns None when no selector was given.
+    """
+    if not fields:
+        return None
+    selected = {name.strip() for name in fields.split(",") if name.strip()}
+    known = set().union(*(model.model_fields for model in models))
+    unknown = selected - known
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(sorted(selected | {"id"}))
+
+
+def mongo_projection(
+    model: Type[BaseModel],
+    selected: Optional[Iterable[str]] = None,
+    extra: Iterable[str] = ()
+) -> Dict[str, Any]:
+    """Mongo projection for the selected fields of model (all of them if none selected)"""
+    names = [name for name in selected if name in model.model_fields] if selected else list(model.model_fields)
+    return {"_id": 0, **{name: 1 for name in (*names, *extra)}}
+
+
+@lru_cache(maxsize=None)
+def _output_fields(model: Type[BaseModel], selected: Optional[Tuple[str, ...]]) -> Tuple[Tuple[str, Any], ...]:
+    """(name, FieldInfo) pairs a response for model should contain, in declaration order"""
+    return tuple(
+        (name, field) for name, field in model.model_fields.items()
+        if selected is None or name in selected
+    )
+
+
+def trusted_document(
+    model: Type[BaseModel],
+    doc: Dict[str, Any],
+    selected: Optional[Tuple[str, ...]] = None
+) -> Dict[str, Any]:
+    """Shape a document the API wrote itself like model, without validating it
+
+    Only missing fields are filled in, from the model's defaults; extra keys
+    (e.g. ones fetched for pagination) are dropped.
+    """
+    return {
+        name: doc[name] if name in doc else field.get_default(call_default_factory=True)
+        for name, field in _output_fields(model, selected)
+    }
+
+
+def trusted_response(
+    model: Type[BaseModel],
+    data: Any,
+    selected: Optional[Tuple[str, ...]] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> MongoJSONResponse:
+    """Respond with DB-sourced documents directly, skipping pydantic and response_model validation"""
+    if isinstance(data, list):
+        content: Any = [trusted_document(model, doc, selected) for doc in data]
+    else:
+        content = trusted_document(model, data, selected)
+    return MongoJSONResponse(content, headers=headers)
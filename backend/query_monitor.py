@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from pymongo import monitoring
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Commands whose plan MongoDB can explain; the values are the field holding their filter
+EXPLAINABLE_COMMANDS = {
+    "find": "filter",
+    "aggregate": None,
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "update": None,
+    "delete": None,
+}
+
+# Fields a driver adds to a command that an explain must not carry
+_DRIVER_FIELDS = {"lsid", "txnNumber", "writeConcern", "readConcern", "autocommit", "startTransaction"}
+
+
+def query_shape(value: Any) -> Any:
+    """A filter with every value replaced by "?", keeping field names and operators"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)) and value and all(isinstance(item, dict) for item in value):
+        return [query_shape(item) for item in value]
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a command that determine its plan, with the values taken out"""
+    if command_name == "aggregate":
+        return {"pipeline": [
+            {stage: query_shape(spec) if stage == "$match" else (spec if stage == "$sort" else "...")
+             for stage, spec in step.items()}
+            for step in command.get("pipeline", [])
+        ]}
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        return {"q": query_shape(statements[0].get("q", {}))}
+    field = EXPLAINABLE_COMMANDS.get(command_name)
+    if field is None:
+        return {}
+    shape = {field: query_shape(command.get(field) or {})}
+    if command.get("sort"):
+        shape["sort"] = dict(command["sort"])
+    return shape
+
+
+def explain_summary(explain: Dict[str, Any]) -> Dict[str, Any]:
+    """Plan stages, indexes and work done, without the query values an explain echoes back"""
+    pipeline_stages = []
+    if "stages" in explain:
+        pipeline_stages = [next(iter(stage)) for stage in explain["stages"]]
+        explain = explain["stages"][0].get("$cursor", {})
+
+    winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    node = winning_plan.get("queryPlan", winning_plan)
+    stages, indexes = [], []
+    while node:
+        stages.append(node.get("stage"))
+        if node.get("indexName"):
+            indexes.append(node["indexName"])
+        node = node.get("inputStage") or (node.get("inputStages") or [None])[0]
+
+    execution = explain.get("executionStats", {})
+    return {
+        "plan": " <- ".join(stage for stage in stages if stage),
+        "indexes": indexes,
+        "pipeline": pipeline_stages,
+        "collection_scan": "COLLSCAN" in stages,
+        "returned": execution.get("nReturned"),
+        "keys_examined": execution.get("totalKeysExamined"),
+        "docs_examined": execution.get("totalDocsExamined"),
+        "execution_ms": execution.get("executionTimeMillis"),
+    }
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """Per-collection command latency, a slow-command log and explains of the slowest shapes
+
+    Listener callbacks run on the driver's threads (Motor runs pymongo in a
+    thread pool), so state is guarded by a lock and explains are handed to
+    the event loop given to start().
+    """
+
+    def __init__(self, slow_ms: float = 100.0, slow_log_size: int = 200, explain_top: int = 10, max_shapes: int = 500):
+        self.slow_ms = slow_ms
+        self.explain_top = explain_top
+        self.max_shapes = max_shapes
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[int, Any], Tuple[str, str, str, Dict[str, Any]]] = {}
+        self._commands: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._slow_log: deque = deque(maxlen=slow_log_size)
+        self._shapes: Dict[str, Dict[str, Any]] = {}
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self, client) -> None:
+        """Enable explain capture; needs the Motor client and the running loop"""
+        self._client = client
+        self._loop = asyncio.get_running_loop()
+
+    # CommandListener interface
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        command = event.command
+        name = event.command_name
+        collection = command.get("collection") if name == "getMore" else command.get(name)
+        if not isinstance(collection, str):
+            return
+        with self._lock:
+            self._pending[(event.request_id, event.connection_id)] = (event.database_name, collection, name, command)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finished(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finished(event, failed=True)
+
+    def _finished(self, event, failed: bool) -> None:
+        with self._lock:
+            started = self._pending.pop((event.request_id, event.connection_id), None)
+            if started is None:
+                return
+            database, collection, name, command = started
+            duration_ms = event.duration_micros / 1000
+
+            stats = self._commands.get((collection, name))
+            if stats is None:
+                stats = self._commands[(collection, name)] = {
+                    "collection": collection, "command": name,
+                    "count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0
+                }
+            stats["count"] += 1
+            stats["errors"] += failed
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+
+            if duration_ms < self.slow_ms:
+                return
+            shape = command_shape(name, command)
+            self._slow_log.append({
+                "at": datetime.utcnow().isoformat(),
+                "collection": collection,
+                "command": name,
+                "duration_ms": round(duration_ms, 2),
+                "failed": failed,
+                "shape": shape,
+            })
+            explain_key = self._record_shape(database, collection, name, shape, command, duration_ms)
+
+        logger.warning("Slow Mongo command %s.%s took %.1fms: %s",
+                       collection, name, duration_ms, orjson.dumps(shape).decode())
+        if explain_key is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self._explain(explain_key)))
+
+    def _record_shape(self, database, collection, name, shape, command, duration_ms) -> Optional[str]:
+        """Track a slow shape; returns its key if it is now among the slowest and needs an explain"""
+        key = f"{collection}.{name} {orjson.dumps(shape, option=orjson.OPT_SORT_KEYS).decode()}"
+        entry = self._shapes.get(key)
+        if entry is None:
+            if len(self._shapes) >= self.max_shapes:
+                del self._shapes[min(self._shapes, key=lambda k: self._shapes[k]["max_ms"])]
+            entry = self._shapes[key] = {
+                "collection": collection, "command": name, "shape": shape,
+                "count": 0, "total_ms": 0.0, "max_ms": 0.0, "explain": None
+            }
+        entry["count"] += 1
+        entry["total_ms"] += duration_ms
+        entry["max_ms"] = max(entry["max_ms"], duration_ms)
+        if name not in EXPLAINABLE_COMMANDS:
+            return None
+        # The sample is only kept to explain it, and never leaves this object
+        entry["_sample"] = (database, command)
+
+        if entry["explain"] is not None:
+            return None
+        if key not in self._slowest_keys():
+            return None
+        entry["explain"] = {"status": "pending"}
+        return key
+
+    def _slowest_keys(self) -> List[str]:
+        return sorted(self._shapes, key=lambda k: self._shapes[k]["max_ms"], reverse=True)[:self.explain_top]
+
+    async def _explain(self, key: str) -> None:
+        with self._lock:
+            entry = self._shapes.get(key)
+            if entry is None:
+                return
+            database, command = entry["_sample"]
+        explainable = {k: v for k, v in command.items() if not k.startswith("$") and k not in _DRIVER_FIELDS}
+        try:
+            explain = await self._client[database].command(
+                {"explain": explainable, "verbosity": "executionStats"}
+            )
+            result = {"status": "done", **explain_summary(explain)}
+        except PyMongoError as e:
+            result = {"status": "failed", "error": str(e)}
+        with self._lock:
+            if key in self._shapes:
+                self._shapes[key]["explain"] = result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            commands = sorted(
+                (
+                    {**stats, "total_ms": round(stats["total_ms"], 2), "max_ms": round(stats["max_ms"], 2),
+                     "avg_ms": round(stats["total_ms"] / stats["count"], 3)}
+                    for stats in self._commands.values()
+                ),
+                key=lambda stats: stats["total_ms"],
+                reverse=True
+            )
+            slowest_shapes = [
+                {
+                    **{k: v for k, v in self._shapes[key].items() if not k.startswith("_")},
+                    "total_ms": round(self._shapes[key]["total_ms"], 2),
+                    "max_ms": round(self._shapes[key]["max_ms"], 2),
+                }
+                for key in self._slowest_keys()
+            ]
+            return {
+                "slow_ms": self.slow_ms,
+                "commands": commands,
+                "slowest_shapes": slowest_shapes,
+                "slow_log": list(self._slow_log)[::-1],
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._commands.clear()
+            self._slow_log.clear()
+            self._shapes.clear()
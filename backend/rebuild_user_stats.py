@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Rebuild the user_stats dashboard read model from challenges and projects.
+
+Run after restoring data or whenever the incremental counters are suspected
+to have drifted. Uses the same storage settings (STORAGE_ENGINE, MONGO_URL /
+DB_NAME or MEMORY_STORE_PATH) as the server.
+"""
+
+import asyncio
+import argparse
+
+from server import dashboard_cache, repositories, user_data_changed, user_stats
+
+async def main(user_id=None):
+    await repositories.start()
+    try:
+        rebuilt = await user_stats.rebuild(user_id)
+        # Bump the users' versions so no instance keeps serving their old dashboards
+        if rebuilt:
+            await user_data_changed(*rebuilt)
+        print(f"Rebuilt stats for {len(rebuilt)} user(s)")
+    finally:
+        await dashboard_cache.close()
+        await repositories.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Rebuild per-user dashboard stats')
+    parser.add_argument('--user-id', help='Only rebuild this user (default: all users)')
+
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id))
@@ -0,0 +1,231 @@
+"""Storage access for users, sessions, challenges and projects
+
+Routes go through a repositories bundle rather than the Motor handle, so the
+storage engine can be swapped: MongoRepositories (here, the default) or
+MemoryRepositories (memory_store.py). Both engines exchange plain dicts
+shaped like the stored documents, without "_id". Projections are Mongo-style
+inclusion dicts ({"_id": 0, "title": 1, ...}).
+"""
+
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from etags import UserVersions
+from indexes import ensure_indexes
+from pagination import ListSort, paginate
+from url_monitor import VALIDATOR_FIELDS
+from user_stats import UserStats
+
+# Fields of a project needed to run its URL checks: the URLs and the validators of the last check
+URL_CHECK_FIELDS = ("id", "user_id", "repository_url", "demo_url", "url_status")
+
+
+def write_errors(exc: BulkWriteError) -> Dict[int, str]:
+    """Failed operations of an unordered bulk write, by their index in the batch"""
+    return {error["index"]: error["errmsg"] for error in exc.details.get("writeErrors", [])}
+
+
+class MongoUserRepository:
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def upsert_by_email(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert the user unless one with the same email exists; returns the stored user"""
+        return await self.collection.find_one_and_update(
+            {"email": user["email"]},
+            {"$setOnInsert": user},
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+
+class MongoSessionRepository:
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def upsert_by_token(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert the session unless one with the same token exists; returns the stored session"""
+        return await self.collection.find_one_and_update(
+            {"session_token": session["session_token"]},
+            {"$setOnInsert": session},
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def find_with_user(self, token: str) -> Optional[Dict[str, Any]]:
+        """Fetch a session with its user document joined under "user" (a 0/1 element list)"""
+        pipeline = [
+            {"$match": {"session_token": token}},
+            {"$limit": 1},
+            {"$lookup": {
+                "from": "users",
+                "localField": "user_id",
+                "foreignField": "id",
+                "as": "user"
+            }}
+        ]
+        sessions = await self.collection.aggregate(pipeline).to_list(1)
+        return sessions[0] if sessions else None
+
+    async def delete(self, token: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one_and_delete({"session_token": token}, projection={"_id": 0})
+
+    async def delete_by_id(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one_and_delete({"id": session_id}, projection={"_id": 0})
+
+    async def tokens(self, now: datetime) -> AsyncIterator[str]:
+        """Tokens of every unexpired session"""
+        cursor = self.collection.find({"expires_at": {"$gt": now}}, {"_id": 0, "session_token": 1}).batch_size(10000)
+        async for session in cursor:
+            yield session["session_token"]
+
+
+class MongoRevocationRepository:
+    """Revoked session ids; the TTL index drops each once no access token for it can still be valid"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def add(self, session_id: str, expires_at: datetime) -> None:
+        await self.collection.update_one(
+            {"session_id": session_id},
+            {"$set": {"session_id": session_id, "expires_at": expires_at}},
+            upsert=True
+        )
+
+    async def active(self, now: datetime) -> Dict[str, datetime]:
+        """Unexpired revocations, session id to expiry"""
+        return {
+            doc["session_id"]: doc["expires_at"]
+            async for doc in self.collection.find({"expires_at": {"$gt": now}}, {"_id": 0})
+        }
+
+
+class MongoOwnedRepository:
+    """Documents owned by a user, addressed by (id, user_id) and listed by (created_at, id)"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def insert(self, doc: Dict[str, Any]) -> None:
+        await self.collection.insert_one(doc)
+
+    async def insert_many(self, docs: List[Dict[str, Any]]) -> Dict[int, str]:
+        """Insert without stopping at the first failure; returns errors by position"""
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            return write_errors(e)
+        return {}
+
+    async def get(self, doc_id: str, user_id: str, projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"id": doc_id, "user_id": user_id}, projection or {"_id": 0})
+
+    async def exists(self, doc_id: str, user_id: str) -> bool:
+        return await self.collection.find_one({"id": doc_id, "user_id": user_id}, {"_id": 1}) is not None
+
+    async def page(
+        self,
+        query: Dict[str, Any],
+        limit: int,
+        cursor: Optional[str] = None,
+        sort: ListSort = ListSort.OLDEST_FIRST,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One keyset page of the documents matching an equality query; see pagination.paginate"""
+        return await paginate(self.collection, query, limit, cursor, sort, projection)
+
+    async def recent(self, user_id: str, limit: int, projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """The user's newest documents, newest first; ties on created_at by id, like the list pages"""
+        return await self.collection.find(
+            {"user_id": user_id}, projection or {"_id": 0}
+        ).sort([("created_at", -1), ("id", -1)]).limit(limit).to_list(limit)
+
+    async def update(
+        self,
+        doc_id: str,
+        user_id: str,
+        update_data: Dict[str, Any],
+        query: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """$set fields in one round trip; returns the document as it was before, or None
+
+        query adds equality conditions the document must also meet.
+        """
+        return await self.collection.find_one_and_update(
+            {"id": doc_id, "user_id": user_id, **(query or {})},
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=ReturnDocument.BEFORE
+        )
+
+    async def delete(self, doc_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one_and_delete({"id": doc_id, "user_id": user_id}, projection={"_id": 0})
+
+    async def stream(self, user_id: str, batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+        """All of the user's documents, oldest first, one cursor batch in memory at a time"""
+        cursor = self.collection.find({"user_id": user_id}, {"_id": 0}).sort("created_at", 1).batch_size(batch_size)
+        async for doc in cursor:
+            yield doc
+
+
+class MongoChallengeRepository(MongoOwnedRepository):
+    pass
+
+
+class MongoProjectRepository(MongoOwnedRepository):
+    # Of url_status, only the validators the next check revalidates with
+    _url_check_projection = {
+        "_id": 0, "id": 1, "user_id": 1, "repository_url": 1, "demo_url": 1,
+        **{f"url_status.{key}.{field}": 1 for key in ("repository", "demo") for field in VALIDATOR_FIELDS}
+    }
+    _has_url = {"$or": [{"repository_url": {"$nin": [None, ""]}}, {"demo_url": {"$nin": [None, ""]}}]}
+
+    async def stale_for_url_check(self, cutoff: datetime, limit: int) -> List[Dict[str, Any]]:
+        """Projects with a URL that were never checked or last checked before cutoff, oldest first"""
+        stale = {"$or": [{"last_url_check": None}, {"last_url_check": {"$lt": cutoff}}]}
+        return await self.collection.find(
+            {"$and": [stale, self._has_url]}, self._url_check_projection
+        ).sort("last_url_check", 1).limit(limit).to_list(limit)
+
+    async def for_url_check(self, project_ids: List[str]) -> List[Dict[str, Any]]:
+        """The given projects, including ones without a URL any more so their old status is cleared"""
+        return await self.collection.find({"id": {"$in": project_ids}}, self._url_check_projection).to_list(None)
+
+    async def set_url_statuses(self, statuses: List[Tuple[str, Dict[str, Any]]], checked_at: datetime) -> None:
+        """Store (project id, url_status) results with one bulk write"""
+        await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"id": project_id},
+                    {"$set": {"url_status": url_status, "last_url_check": checked_at, "updated_at": checked_at}}
+                )
+                for project_id, url_status in statuses
+            ],
+            ordered=False
+        )
+
+
+class MongoRepositories:
+    """The Motor storage engine"""
+
+    def __init__(self, db):
+        self.db = db
+        self.users = MongoUserRepository(db.users)
+        self.sessions = MongoSessionRepository(db.sessions)
+        self.revocations = MongoRevocationRepository(db.revoked_sessions)
+        self.challenges = MongoChallengeRepository(db.challenges)
+        self.projects = MongoProjectRepository(db.projects)
+        self.user_stats = UserStats(db)
+        self.user_versions = UserVersions(db)
+
+    async def start(self) -> None:
+        await ensure_indexes(self.db)
+
+    async def close(self) -> None:
+        self.db.client.close()
@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCacheBackend:
+    """In-process LRU backend; each worker process has its own copy"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.pop(key)
+
+    async def close(self) -> None:
+        self._cache.clear()
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisCacheBackend:
+    """Shared backend speaking the Redis protocol (RESP) over a small connection pool
+
+    Works with Redis and anything RESP-compatible (KeyDB, Dragonfly, a local
+    stand-in). Only GET, SET EX and DEL are used. Connection problems are
+    logged and treated as misses so the cache can never take the API down;
+    after a failure, commands are skipped for retry_after seconds instead of
+    each waiting out the timeout. Skipped deletes are safe: entries are only
+    served under the ETag they were rendered with.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        pool_size: int = 4,
+        timeout: float = 1.0,
+        retry_after: float = 5.0
+    ):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.database = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._down_until = 0.0
+        self.failures = 0
+        self.skipped = 0
+        self._pool: "asyncio.Queue[Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]]" = asyncio.Queue()
+        for _ in range(pool_size):
+            self._pool.put_nowait(None)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._execute_quietly("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._execute_quietly("SET", key, value, "EX", max(1, int(ttl)))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._execute_quietly("DEL", *keys)
+
+    async def close(self) -> None:
+        while not self._pool.empty():
+            connection = self._pool.get_nowait()
+            if connection is not None:
+                connection[1].close()
+
+    async def _execute_quietly(self, *args: Any) -> Any:
+        if time.monotonic() < self._down_until:
+            self.skipped += 1
+            return None
+        try:
+            return await self.execute(*args)
+        except (OSError, asyncio.TimeoutError, RedisError) as e:
+            self.failures += 1
+            self._down_until = time.monotonic() + self.retry_after
+            logger.warning("Redis cache command %s failed, skipping the cache for %.1fs: %s",
+                           args[0], self.retry_after, e)
+            return None
+
+    async def execute(self, *args: Any) -> Any:
+        connection = await self._pool.get()
+        try:
+            if connection is None:
+                connection = await asyncio.wait_for(self._connect(), self.timeout)
+            reader, writer = connection
+            writer.write(self._encode(args))
+            reply = await asyncio.wait_for(self._read_reply(reader), self.timeout)
+        except BaseException:
+            if connection is not None:
+                connection[1].close()
+            self._pool.put_nowait(None)
+            raise
+        self._pool.put_nowait(connection)
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.database:
+            setup.append(("SELECT", self.database))
+        for command in setup:
+            writer.write(self._encode(command))
+            reply = await self._read_reply(reader)
+            if isinstance(reply, RedisError):
+                writer.close()
+                raise reply
+        return reader, writer
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    async def _read_reply(self, reader: asyncio.StreamReader) -> Any:
+        line = await reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise RedisError("Connection closed by server")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            return RedisError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await reader.readexactly(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            count = int(payload)
+            if count < 0:
+                return None
+            return [await self._read_reply(reader) for _ in range(count)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+
+class ResponseCache:
+    """Per-user cache of rendered response bodies, validated against the user's ETag
+
+    An entry is only served while the ETag it was rendered under is still
+    current, so a write seen by any worker makes it unusable even before the
+    explicit invalidation reaches this backend.
+
+    That makes the user's version the only thing that retires an entry: any
+    path that changes what a cached response shows, writes and stats
+    rebuilds alike, must go through server.user_data_changed afterwards.
+    A path that updates the data without it leaves the old body being
+    served, and 304s issued for it, until the user's next write.
+    """
+
+    def __init__(self, backend, ttl: float = 60.0, prefix: str = "response:"):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.invalidations = 0
+        self._served_age_total = 0.0
+        self._served_age_max = 0.0
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.prefix}{user_id}"
+
+    async def get(self, user_id: str, etag: str) -> Optional[bytes]:
+        value = await self.backend.get(self._key(user_id))
+        if value is None:
+            self.misses += 1
+            return None
+
+        cached_etag, cached_at, body = value.split(b"\n", 2)
+        if cached_etag.decode() != etag:
+            self.stale += 1
+            self.misses += 1
+            return None
+
+        age = time.time() - float(cached_at)
+        self.hits += 1
+        self._served_age_total += age
+        self._served_age_max = max(self._served_age_max, age)
+        return body
+
+    async def set(self, user_id: str, etag: str, body: bytes) -> None:
+        value = b"%s\n%f\n%s" % (etag.encode(), time.time(), body)
+        await self.backend.set(self._key(user_id), value, self.ttl)
+
+    async def invalidate(self, *user_ids: str) -> None:
+        if user_ids:
+            self.invalidations += len(user_ids)
+            await self.backend.delete(*(self._key(user_id) for user_id in user_ids))
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "backend_failures": getattr(self.backend, "failures", 0),
+            "backend_skipped": getattr(self.backend, "skipped", 0),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "served_age_avg_seconds": round(self._served_age_total / self.hits, 3) if self.hits else 0.0,
+            "served_age_max_seconds": round(self._served_age_max, 3),
+        }
+
+
+def create_cache_backend(kind: str, redis_url: str, maxsize: int, ttl: float):
+    if kind == "redis":
+        return RedisCacheBackend(redis_url)
+    if kind != "memory":
+        raise ValueError(f"Unknown cache backend: {kind}")
+    return MemoryCacheBackend(maxsize=maxsize, ttl=ttl)
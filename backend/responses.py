@@ -0,0 +1,29 @@
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    """Types orjson doesn't serialize natively (datetime, UUID and enums it does)"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize Mongo documents, models and plain data to JSON in a single pass"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class MongoJSONResponse(JSONResponse):
+    """App-wide default response class; routes can return raw Mongo documents"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationList:
+    """Ids of logged-out sessions, shared by every instance of the backend
+
+    Anything that trusts a session without looking it up (the session cache,
+    access tokens) checks this set first. Revocations are written through to
+    the repository and the set is reloaded every refresh_interval seconds, so
+    a logout on one instance reaches the others within that interval. A
+    revocation only has to outlive the longest such trust (ttl), so the set
+    stays small.
+    """
+
+    def __init__(self, repository, ttl: float = 900.0, refresh_interval: float = 30.0):
+        self.repository = repository
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self._revoked: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    async def revoke(self, session_id: str) -> None:
+        expires_at = datetime.utcnow() + timedelta(seconds=self.ttl)
+        self._revoked[session_id] = expires_at
+        await self.repository.add(session_id, expires_at)
+
+    async def refresh(self) -> None:
+        """Reload the set, taking in other instances' revocations and dropping expired ones"""
+        self._revoked = await self.repository.active(datetime.utcnow())
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Session revocation refresh failed")
+            await asyncio.sleep(self.refresh_interval)
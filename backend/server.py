@@ -1,39 +1,74 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, BackgroundTasks, Query, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, ValidationError
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timedelta
 import aiohttp
 import asyncio
 from enum import Enum
-import requests
-import json
-from bson import ObjectId
-
-# Custom JSON encoder for MongoDB ObjectId
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        return super().default(obj)
+import zlib
+from collections import Counter
+
+from access_tokens import AccessTokenError, AccessTokens, is_access_token
+from cache import CachedSession, SessionCache
+from etags import NotModified, etag_headers, etag_matches, make_etag
+from indexes import index_usage
+from metrics import (
+    PrometheusMiddleware, metrics_response, record_token_rejection, record_url_check, track_background_task,
+    track_token_filter
+)
+from memory_store import MemoryRepositories
+from pagination import ListSort
+from query_monitor import CommandMonitor
+from projection import mongo_projection, parse_fields, trusted_response
+from response_cache import ResponseCache, create_cache_backend
+from repositories import MongoRepositories
+from revocations import RevocationList
+from responses import MongoJSONResponse, dumps
+from token_filter import TokenFilter
+from url_monitor import URLMonitor, URLSweeper
+from user_stats import challenge_counters, project_counters
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Per-command latency, slow-command log and explains of the slowest query shapes
+command_monitor = CommandMonitor(
+    slow_ms=float(os.environ.get('MONGO_SLOW_QUERY_MS', '100')),
+    explain_top=int(os.environ.get('MONGO_EXPLAIN_TOP', '10'))
+)
+
+# Storage engine: "mongo" (default), or "memory" for single-node deployments and database-free benchmarks
+STORAGE_ENGINE = os.environ.get('STORAGE_ENGINE', 'mongo')
+if STORAGE_ENGINE == 'memory':
+    client = None
+    db = None
+    repositories = MemoryRepositories(
+        path=os.environ.get('MEMORY_STORE_PATH') or None,
+        compact_every=int(os.environ.get('MEMORY_STORE_COMPACT_EVERY', '100000')),
+        fsync=os.environ.get('MEMORY_STORE_FSYNC', 'false').lower() == 'true'
+    )
+else:
+    mongo_url = os.environ['MONGO_URL']
+    client = AsyncIOMotorClient(mongo_url, event_listeners=[command_monitor])
+    db = client[os.environ['DB_NAME']]
+    repositories = MongoRepositories(db)
 
 # Create the main app without a prefix
-app = FastAPI(title="Challenge Tracker Platform", version="1.0.0")
+app = FastAPI(
+    title="Challenge Tracker Platform",
+    version="1.0.0",
+    default_response_class=MongoJSONResponse
+)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -41,6 +76,107 @@ api_router = APIRouter(prefix="/api")
 # Security
 security = HTTPBearer()
 
+# Per-user dashboard counters, maintained incrementally by the write routes
+user_stats = repositories.user_stats
+
+# Per-user data version behind the ETags of the read endpoints
+user_versions = repositories.user_versions
+
+# Warm sessions are resolved from memory; entries never outlive the session's expires_at.
+# A logout drops the entry on the instance that handled it at once; other instances
+# stop accepting the token once their revocation list refreshes (SESSION_REVOCATION_REFRESH).
+SESSION_CACHE_TTL = float(os.environ.get('SESSION_CACHE_TTL', '300'))
+session_cache = SessionCache(
+    maxsize=int(os.environ.get('SESSION_CACHE_SIZE', '10000')),
+    ttl=SESSION_CACHE_TTL
+)
+
+# Optional signed access tokens, verified without a session lookup; the session token refreshes them
+ACCESS_TOKENS_ENABLED = os.environ.get('ACCESS_TOKENS_ENABLED', 'false').lower() == 'true'
+ACCESS_TOKEN_TTL = float(os.environ.get('ACCESS_TOKEN_TTL', '900'))
+
+# Logged-out session ids, shared across instances; kept as long as a cached session or access token can live
+revoked_sessions = RevocationList(
+    repositories.revocations,
+    ttl=max(SESSION_CACHE_TTL, ACCESS_TOKEN_TTL if ACCESS_TOKENS_ENABLED else 0),
+    refresh_interval=float(os.environ.get('SESSION_REVOCATION_REFRESH', '30'))
+)
+
+access_tokens = AccessTokens(
+    revoked_sessions,
+    secret=os.environ['ACCESS_TOKEN_SECRET'],
+    ttl=ACCESS_TOKEN_TTL,
+    algorithm=os.environ.get('ACCESS_TOKEN_ALGORITHM', 'HS256')
+) if ACCESS_TOKENS_ENABLED else None
+
+# Bogus and stale bearer tokens are turned away before they cost a session lookup
+token_filter = TokenFilter(
+    repositories.sessions.tokens,
+    negative_cache_size=int(os.environ.get('TOKEN_NEGATIVE_CACHE_SIZE', '100000')),
+    negative_cache_ttl=float(os.environ.get('TOKEN_NEGATIVE_CACHE_TTL', '300')),
+    bloom_enabled=os.environ.get('TOKEN_BLOOM_ENABLED', 'false').lower() == 'true',
+    bloom_capacity=int(os.environ.get('TOKEN_BLOOM_CAPACITY', '1000000')),
+    bloom_error_rate=float(os.environ.get('TOKEN_BLOOM_ERROR_RATE', '0.001')),
+    rebuild_interval=float(os.environ.get('TOKEN_BLOOM_REBUILD_INTERVAL', '300')),
+    on_rejection=record_token_rejection
+)
+track_token_filter(token_filter)
+
+# Rendered dashboards per user: in-process LRU by default, or shared over the Redis protocol
+DASHBOARD_CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL', '60'))
+dashboard_cache = ResponseCache(
+    create_cache_backend(
+        os.environ.get('DASHBOARD_CACHE_BACKEND', 'memory'),
+        redis_url=os.environ.get('DASHBOARD_CACHE_REDIS_URL', 'redis://localhost:6379/0'),
+        maxsize=int(os.environ.get('DASHBOARD_CACHE_SIZE', '10000')),
+        ttl=DASHBOARD_CACHE_TTL
+    ),
+    ttl=DASHBOARD_CACHE_TTL,
+    prefix="dashboard:"
+)
+
+# Emergent Auth outbound client, created at startup and shared by all requests
+EMERGENT_AUTH_URL = os.environ.get(
+    'EMERGENT_AUTH_URL',
+    'https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data'
+)
+EMERGENT_AUTH_TIMEOUT = float(os.environ.get('EMERGENT_AUTH_TIMEOUT', '10'))
+EMERGENT_AUTH_CONNECT_TIMEOUT = float(os.environ.get('EMERGENT_AUTH_CONNECT_TIMEOUT', '5'))
+EMERGENT_AUTH_MAX_CONNECTIONS = int(os.environ.get('EMERGENT_AUTH_MAX_CONNECTIONS', '100'))
+auth_http_session: Optional[aiohttp.ClientSession] = None
+
+# URL monitor: one keep-alive session shared by every check
+url_monitor = URLMonitor(
+    max_connections=int(os.environ.get('URL_MONITOR_MAX_CONNECTIONS', '100')),
+    max_connections_per_host=int(os.environ.get('URL_MONITOR_MAX_CONNECTIONS_PER_HOST', '10')),
+    dns_cache_ttl=int(os.environ.get('URL_MONITOR_DNS_CACHE_TTL', '300')),
+    concurrency=int(os.environ.get('URL_MONITOR_CONCURRENCY', '50')),
+    timeout=float(os.environ.get('URL_MONITOR_TIMEOUT', '10')),
+    on_result=record_url_check
+)
+
+# Periodic re-check of projects whose url_status is older than URL_SWEEP_STALE_AFTER seconds
+URL_SWEEP_ENABLED = os.environ.get('URL_SWEEP_ENABLED', 'true').lower() == 'true'
+url_sweeper = URLSweeper(
+    repositories.projects,
+    url_monitor,
+    interval=float(os.environ.get('URL_SWEEP_INTERVAL', '300')),
+    stale_after=float(os.environ.get('URL_SWEEP_STALE_AFTER', '3600')),
+    batch_size=int(os.environ.get('URL_SWEEP_BATCH_SIZE', '500')),
+    on_batch_checked=lambda projects: user_data_changed(*{p["user_id"] for p in projects})
+)
+
+# List endpoints return one page; the cursor for the next one is sent in a header
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', '100'))
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PAGINATION_FIELDS = ("id", "created_at")
+
+# Largest number of items accepted by a :batch endpoint
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '500'))
+
+ADMIN_EMAILS = {e.strip() for e in os.environ.get('ADMIN_EMAILS', '').split(',') if e.strip()}
+
 # Models
 class User(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -121,153 +257,200 @@ class ProjectUpdate(BaseModel):
     status: Optional[ProjectStatus] = None
     progress_percentage: Optional[int] = None
 
-# Helper function to convert MongoDB documents to serializable format
-def serialize_mongo_doc(doc):
-    """Convert MongoDB document to serializable format"""
-    if doc is None:
-        return None
-    
-    if isinstance(doc, list):
-        return [serialize_mongo_doc(item) for item in doc]
-    
-    if isinstance(doc, dict):
-        result = {}
-        for key, value in doc.items():
-            if isinstance(value, ObjectId):
-                result[key] = str(value)
-            elif isinstance(value, (datetime, list, dict)):
-                result[key] = serialize_mongo_doc(value)
-            else:
-                result[key] = value
-        return result
-    
-    if isinstance(doc, ObjectId):
-        return str(doc)
-    
-    if isinstance(doc, datetime):
-        return doc.isoformat()
-    
-    return doc
+class ProjectBatchUpdate(ProjectUpdate):
+    id: str
+
+class BatchItemError(BaseModel):
+    index: int
+    id: Optional[str] = None
+    error: str
+
+class ProjectBatchResult(BaseModel):
+    projects: List[Project] = []
+    errors: List[BatchItemError] = []
 
 # Auth functions
-async def get_current_user(authorization: HTTPAuthorizationCredentials = Depends(security)):
-    token = authorization.credentials
+async def load_session(token: str):
+    """The session behind a session token and its user; 401s unless the session is usable"""
+    if token_filter.check(token):
+        raise HTTPException(status_code=401, detail="Invalid session")
     
-    # Check if session exists and is valid
-    session = await db.sessions.find_one({"session_token": token})
+    # Resolve session and its user in one round trip
+    session = await repositories.sessions.find_with_user(token)
     if not session:
+        token_filter.reject(token)
         raise HTTPException(status_code=401, detail="Invalid session")
     
     # Check if session is expired
     if datetime.utcnow() > session["expires_at"]:
-        await db.sessions.delete_one({"session_token": token})
+        await repositories.sessions.delete(token)
+        session_cache.pop(token)
+        token_filter.reject(token, stored=True)
         raise HTTPException(status_code=401, detail="Session expired")
     
-    # Get user
-    user = await db.users.find_one({"id": session["user_id"]})
+    user = session["user"][0] if session["user"] else None
     if not user:
+        token_filter.reject(token, stored=True)
         raise HTTPException(status_code=401, detail="User not found")
     
-    return User(**user)
+    return session, User(**user)
 
-# URL monitoring background task
-async def check_url_status(url: str) -> Dict[str, Any]:
-    """Check if URL is accessible and return status info"""
+def verify_access_token(token: str) -> Dict[str, Any]:
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=10) as response:
-                return {
-                    "url": url,
-                    "status_code": response.status,
-                    "accessible": response.status < 400,
-                    "response_time": response.headers.get("X-Response-Time", "N/A"),
-                    "checked_at": datetime.utcnow().isoformat()
-                }
-    except Exception as e:
-        return {
-            "url": url,
-            "status_code": None,
-            "accessible": False,
-            "error": str(e),
-            "checked_at": datetime.utcnow().isoformat()
-        }
+        return access_tokens.verify(token)
+    except AccessTokenError as e:
+        raise HTTPException(status_code=401, detail=str(e))
 
+async def get_current_user(authorization: HTTPAuthorizationCredentials = Depends(security)):
+    token = authorization.credentials
+    
+    # Access tokens are verified locally, without a session lookup
+    if access_tokens is not None and is_access_token(token):
+        claims = verify_access_token(token)
+        return User(id=claims["sub"], **claims["user"])
+    
+    cached = session_cache.get(token)
+    if cached is not None:
+        # Another instance may have logged the session out since it was cached
+        if cached.session_id not in revoked_sessions:
+            return cached.user
+        session_cache.pop(token)
+    
+    session, user = await load_session(token)
+    remaining = (session["expires_at"] - datetime.utcnow()).total_seconds()
+    session_cache.set(token, CachedSession(user, session["id"]), ttl=remaining)
+    return user
+
+async def conditional_etag(request: Request, current_user: User = Depends(get_current_user)) -> str:
+    """ETag for a read of the current user's data; 304s before the route runs if it still matches
+
+    The version is read before the route reads any data, so a concurrent write
+    can only make the ETag older than the body, never newer.
+    """
+    version = await user_versions.get(current_user.id)
+    etag = make_etag(current_user.id, version, request.url.path, request.url.query)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise NotModified(etag)
+    return etag
+
+async def get_admin_user(current_user: User = Depends(get_current_user)):
+    if current_user.email not in ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+# URL monitoring background tasks
+@track_background_task("monitor_project_urls")
 async def monitor_project_urls(project_id: str):
     """Background task to monitor project URLs"""
-    project = await db.projects.find_one({"id": project_id})
-    if not project:
-        return
-    
-    url_status = {}
-    
-    # Check repository URL
-    if project.get("repository_url"):
-        status = await check_url_status(project["repository_url"])
-        url_status["repository"] = status
-    
-    # Check demo URL
-    if project.get("demo_url"):
-        status = await check_url_status(project["demo_url"])
-        url_status["demo"] = status
-    
-    # Update project with URL status
-    await db.projects.update_one(
-        {"id": project_id},
-        {
-            "$set": {
-                "url_status": url_status,
-                "last_url_check": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }
-        }
+    await url_sweeper.check_project_ids([project_id])
+
+@track_background_task("monitor_projects_urls")
+async def monitor_projects_urls(project_ids: List[str]):
+    """Background task to check many projects' URLs in sweeper-sized batches"""
+    await url_sweeper.check_project_ids(project_ids)
+
+# Write helpers
+async def user_data_changed(*user_ids: str):
+    """Expire everything derived from these users' challenges and projects
+
+    Must run after the write and its user_stats update have completed: a read
+    that sees the new version then also sees the new data, so an ETag can
+    never be newer than the body rendered under it.
+    """
+    await asyncio.gather(
+        user_versions.bump_many(user_ids),
+        dashboard_cache.invalidate(*user_ids)
     )
 
+async def update_owned_document(repository, doc_id: str, user_id: str, update_data: Dict[str, Any], not_found: str):
+    """Atomically $set fields on a document the user owns, in one round trip
+
+    Returns the document as it was before and after the update; 404s when
+    there is no such document for this user.
+    """
+    before = await repository.update(doc_id, user_id, update_data)
+    if not before:
+        raise HTTPException(status_code=404, detail=not_found)
+    return before, {**before, **update_data}
+
 # Auth Routes
 @api_router.post("/auth/profile")
 async def get_user_profile(x_session_id: str = Header(...)):
     """Get user profile from Emergent Auth"""
     try:
-        headers = {"X-Session-ID": x_session_id}
-        response = requests.get(
-            "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
-            headers=headers
-        )
-        
-        if response.status_code != 200:
-            raise HTTPException(status_code=401, detail="Invalid session")
-        
-        user_data = response.json()
+        async with auth_http_session.get(
+            EMERGENT_AUTH_URL,
+            headers={"X-Session-ID": x_session_id}
+        ) as response:
+            if response.status != 200:
+                raise HTTPException(status_code=401, detail="Invalid session")
+            
+            user_data = await response.json(content_type=None)
         
-        # Check if user exists
-        existing_user = await db.users.find_one({"email": user_data["email"]})
-        
-        if not existing_user:
-            # Create new user
-            user = User(
-                email=user_data["email"],
-                name=user_data["name"],
-                picture=user_data.get("picture")
-            )
-            await db.users.insert_one(user.dict())
-        else:
-            user = User(**existing_user)
+        # Create the user on first login, otherwise return the existing one
+        new_user = User(
+            email=user_data["email"],
+            name=user_data["name"],
+            picture=user_data.get("picture")
+        )
+        user_doc = await repositories.users.upsert_by_email(new_user.dict())
+        user = User(**user_doc)
         
-        # Create session
-        session = Session(
+        # Create the session, or reuse it when this session id was already exchanged
+        new_session = Session(
             user_id=user.id,
             session_token=user_data["session_token"],
             expires_at=datetime.utcnow() + timedelta(days=7)
         )
-        await db.sessions.insert_one(session.dict())
+        session = Session(**await repositories.sessions.upsert_by_token(new_session.dict()))
+        token_filter.add(session.session_token)
         
-        return {
+        profile = {
             "user": user,
             "session_token": user_data["session_token"]
         }
+        if access_tokens is not None:
+            profile["access_token"], profile["access_token_expires_at"] = access_tokens.issue(
+                user.dict(), session.id, session.expires_at
+            )
+        return profile
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/auth/refresh")
+async def refresh_access_token(authorization: HTTPAuthorizationCredentials = Depends(security)):
+    """Mint a new access token from the session token"""
+    if access_tokens is None:
+        raise HTTPException(status_code=404, detail="Access tokens are not enabled")
+    token = authorization.credentials
+    if is_access_token(token):
+        raise HTTPException(status_code=401, detail="Refresh with the session token")
+    
+    session, user = await load_session(token)
+    access_token, expires_at = access_tokens.issue(user.dict(), session["id"], session["expires_at"])
+    return {"access_token": access_token, "access_token_expires_at": expires_at}
+
+@api_router.post("/auth/logout")
+async def logout(authorization: HTTPAuthorizationCredentials = Depends(security)):
+    token = authorization.credentials
+    if access_tokens is not None and is_access_token(token):
+        # The token names the session by id; every cached copy of the user's sessions is dropped with it
+        claims = verify_access_token(token)
+        session_id = claims["sid"]
+        await repositories.sessions.delete_by_id(session_id)
+        session_cache.invalidate_user(claims["sub"])
+    else:
+        session = await repositories.sessions.delete(token)
+        session_cache.pop(token)
+        session_id = session["id"] if session else None
+    
+    if session_id:
+        await revoked_sessions.revoke(session_id)
+    return {"message": "Logged out successfully"}
+
 # Challenge Routes
 @api_router.post("/challenges", response_model=Challenge)
 async def create_challenge(
@@ -287,23 +470,44 @@ async def create_challenge(
     if challenge_data.duration_days:
         challenge.end_date = challenge.start_date + timedelta(days=challenge_data.duration_days)
     
-    await db.challenges.insert_one(challenge.dict())
+    await repositories.challenges.insert(challenge.dict())
+    await user_stats.apply(current_user.id, challenge_counters(None), challenge_counters(challenge.dict()))
+    await user_data_changed(current_user.id)
     return challenge
 
 @api_router.get("/challenges", response_model=List[Challenge])
-async def get_challenges(current_user: User = Depends(get_current_user)):
-    challenges = await db.challenges.find({"user_id": current_user.id}).to_list(1000)
-    return [Challenge(**challenge) for challenge in challenges]
+async def get_challenges(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: ListSort = ListSort.OLDEST_FIRST,
+    fields: Optional[str] = None,
+    etag: str = Depends(conditional_etag),
+    current_user: User = Depends(get_current_user)
+):
+    selected = parse_fields(fields, Challenge)
+    challenges, next_cursor = await repositories.challenges.page(
+        {"user_id": current_user.id}, limit, cursor, sort,
+        projection=mongo_projection(Challenge, selected, extra=PAGINATION_FIELDS)
+    )
+    headers = etag_headers(etag)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return trusted_response(Challenge, challenges, selected, headers)
 
 @api_router.get("/challenges/{challenge_id}", response_model=Challenge)
 async def get_challenge(
     challenge_id: str,
+    fields: Optional[str] = None,
+    etag: str = Depends(conditional_etag),
     current_user: User = Depends(get_current_user)
 ):
-    challenge = await db.challenges.find_one({"id": challenge_id, "user_id": current_user.id})
+    selected = parse_fields(fields, Challenge)
+    challenge = await repositories.challenges.get(
+        challenge_id, current_user.id, mongo_projection(Challenge, selected)
+    )
     if not challenge:
         raise HTTPException(status_code=404, detail="Challenge not found")
-    return Challenge(**challenge)
+    return trusted_response(Challenge, challenge, selected, etag_headers(etag))
 
 @api_router.put("/challenges/{challenge_id}", response_model=Challenge)
 async def update_challenge(
@@ -311,19 +515,14 @@ async def update_challenge(
     challenge_data: ChallengeCreate,
     current_user: User = Depends(get_current_user)
 ):
-    challenge = await db.challenges.find_one({"id": challenge_id, "user_id": current_user.id})
-    if not challenge:
-        raise HTTPException(status_code=404, detail="Challenge not found")
-    
     update_data = challenge_data.dict()
     update_data["updated_at"] = datetime.utcnow()
     
-    await db.challenges.update_one(
-        {"id": challenge_id, "user_id": current_user.id},
-        {"$set": update_data}
+    challenge, updated_challenge = await update_owned_document(
+        repositories.challenges, challenge_id, current_user.id, update_data, "Challenge not found"
     )
-    
-    updated_challenge = await db.challenges.find_one({"id": challenge_id, "user_id": current_user.id})
+    await user_stats.apply(current_user.id, challenge_counters(challenge), challenge_counters(updated_challenge))
+    await user_data_changed(current_user.id)
     return Challenge(**updated_challenge)
 
 # Project Routes
@@ -335,9 +534,7 @@ async def create_project(
     current_user: User = Depends(get_current_user)
 ):
     # Verify challenge exists and belongs to user
-    challenge = await db.challenges.find_one({"id": challenge_id, "user_id": current_user.id})
-    if not challenge:
-        raise HTTPException(status_code=404, detail="Challenge not found")
+    await verify_challenge_owner(challenge_id, current_user.id)
     
     project = Project(
         challenge_id=challenge_id,
@@ -350,7 +547,9 @@ async def create_project(
         status=project_data.status
     )
     
-    await db.projects.insert_one(project.dict())
+    await repositories.projects.insert(project.dict())
+    await user_stats.apply(current_user.id, project_counters(None), project_counters(project.dict()))
+    await user_data_changed(current_user.id)
     
     # Start URL monitoring in background
     if project.repository_url or project.demo_url:
@@ -361,25 +560,41 @@ async def create_project(
 @api_router.get("/challenges/{challenge_id}/projects", response_model=List[Project])
 async def get_challenge_projects(
     challenge_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: ListSort = ListSort.OLDEST_FIRST,
+    fields: Optional[str] = None,
+    etag: str = Depends(conditional_etag),
     current_user: User = Depends(get_current_user)
 ):
+    selected = parse_fields(fields, Project)
+    
     # Verify challenge exists and belongs to user
-    challenge = await db.challenges.find_one({"id": challenge_id, "user_id": current_user.id})
-    if not challenge:
-        raise HTTPException(status_code=404, detail="Challenge not found")
+    await verify_challenge_owner(challenge_id, current_user.id)
     
-    projects = await db.projects.find({"challenge_id": challenge_id, "user_id": current_user.id}).to_list(1000)
-    return [Project(**project) for project in projects]
+    projects, next_cursor = await repositories.projects.page(
+        {"user_id": current_user.id, "challenge_id": challenge_id}, limit, cursor, sort,
+        projection=mongo_projection(Project, selected, extra=PAGINATION_FIELDS)
+    )
+    headers = etag_headers(etag)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return trusted_response(Project, projects, selected, headers)
 
 @api_router.get("/projects/{project_id}", response_model=Project)
 async def get_project(
     project_id: str,
+    fields: Optional[str] = None,
+    etag: str = Depends(conditional_etag),
     current_user: User = Depends(get_current_user)
 ):
-    project = await db.projects.find_one({"id": project_id, "user_id": current_user.id})
+    selected = parse_fields(fields, Project)
+    project = await repositories.projects.get(
+        project_id, current_user.id, mongo_projection(Project, selected)
+    )
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return Project(**project)
+    return trusted_response(Project, project, selected, etag_headers(etag))
 
 @api_router.put("/projects/{project_id}", response_model=Project)
 async def update_project(
@@ -388,23 +603,19 @@ async def update_project(
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user)
 ):
-    project = await db.projects.find_one({"id": project_id, "user_id": current_user.id})
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
     update_data = {k: v for k, v in project_data.dict().items() if v is not None}
     update_data["updated_at"] = datetime.utcnow()
     
-    await db.projects.update_one(
-        {"id": project_id, "user_id": current_user.id},
-        {"$set": update_data}
+    project, updated_project = await update_owned_document(
+        repositories.projects, project_id, current_user.id, update_data, "Project not found"
     )
     
     # Re-monitor URLs if they were updated
     if "repository_url" in update_data or "demo_url" in update_data:
         background_tasks.add_task(monitor_project_urls, project_id)
     
-    updated_project = await db.projects.find_one({"id": project_id, "user_id": current_user.id})
+    await user_stats.apply(current_user.id, project_counters(project), project_counters(updated_project))
+    await user_data_changed(current_user.id)
     return Project(**updated_project)
 
 @api_router.delete("/projects/{project_id}")
@@ -412,68 +623,276 @@ async def delete_project(
     project_id: str,
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.projects.delete_one({"id": project_id, "user_id": current_user.id})
-    if result.deleted_count == 0:
+    project = await repositories.projects.delete(project_id, current_user.id)
+    if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    await user_stats.apply(current_user.id, project_counters(project), project_counters(None))
+    await user_data_changed(current_user.id)
     return {"message": "Project deleted successfully"}
 
-# Dashboard Routes
-@api_router.get("/dashboard")
-async def get_dashboard(current_user: User = Depends(get_current_user)):
-    # Get user's challenges
-    challenges_cursor = db.challenges.find({"user_id": current_user.id})
-    challenges = await challenges_cursor.to_list(1000)
-    challenges = serialize_mongo_doc(challenges)
+# Batch project routes: one ownership check, one bulk insert or concurrent per-project updates, one URL check job
+def check_batch_size(items: List[Any]):
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {MAX_BATCH_SIZE} items")
+
+def validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in exc.errors())
+
+def batch_counters(docs: List[Dict[str, Any]]) -> Counter:
+    return sum((project_counters(doc) for doc in docs), Counter())
+
+async def verify_challenge_owner(challenge_id: str, user_id: str):
+    if not await repositories.challenges.exists(challenge_id, user_id):
+        raise HTTPException(status_code=404, detail="Challenge not found")
+
+@api_router.post("/challenges/{challenge_id}/projects:batch", response_model=ProjectBatchResult)
+async def create_projects_batch(
+    challenge_id: str,
+    items: List[Dict[str, Any]],
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """Create many projects at once; invalid or rejected items are reported, the rest are kept"""
+    check_batch_size(items)
+    await verify_challenge_owner(challenge_id, current_user.id)
+    
+    errors = []
+    indexed_projects = []
+    for index, item in enumerate(items):
+        try:
+            project_data = ProjectCreate(**item)
+        except ValidationError as e:
+            errors.append(BatchItemError(index=index, error=validation_message(e)))
+            continue
+        indexed_projects.append((index, Project(challenge_id=challenge_id, user_id=current_user.id, **project_data.dict())))
+    
+    failed = {}
+    if indexed_projects:
+        failed = await repositories.projects.insert_many([project.dict() for _, project in indexed_projects])
+    
+    created = []
+    for position, (index, project) in enumerate(indexed_projects):
+        if position in failed:
+            errors.append(BatchItemError(index=index, id=project.id, error=failed[position]))
+        else:
+            created.append(project)
     
-    # Get user's projects
-    projects_cursor = db.projects.find({"user_id": current_user.id})
-    projects = await projects_cursor.to_list(1000)
-    projects = serialize_mongo_doc(projects)
+    if created:
+        await user_stats.apply(current_user.id, Counter(), batch_counters([p.dict() for p in created]))
+        await user_data_changed(current_user.id)
+        monitored = [p.id for p in created if p.repository_url or p.demo_url]
+        if monitored:
+            background_tasks.add_task(monitor_projects_urls, monitored)
     
-    # Calculate stats
-    total_challenges = len(challenges)
-    active_challenges = len([c for c in challenges if c["status"] == "active"])
-    completed_challenges = len([c for c in challenges if c["status"] == "completed"])
+    return ProjectBatchResult(projects=created, errors=sorted(errors, key=lambda e: e.index))
+
+@api_router.put("/challenges/{challenge_id}/projects:batch", response_model=ProjectBatchResult)
+async def update_projects_batch(
+    challenge_id: str,
+    items: List[Dict[str, Any]],
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """Update many of a challenge's projects at once; each item names the project by id"""
+    check_batch_size(items)
+    await verify_challenge_owner(challenge_id, current_user.id)
+    
+    errors = []
+    updates = {}
+    for index, item in enumerate(items):
+        try:
+            project_data = ProjectBatchUpdate(**item)
+        except ValidationError as e:
+            # The id is echoed back as sent, so it may not have been a string
+            item_id = str(item["id"]) if item.get("id") is not None else None
+            errors.append(BatchItemError(index=index, id=item_id, error=validation_message(e)))
+            continue
+        if project_data.id in updates:
+            errors.append(BatchItemError(index=index, id=project_data.id, error="Project appears more than once in the batch"))
+            continue
+        update_data = {k: v for k, v in project_data.dict(exclude={"id"}).items() if v is not None}
+        update_data["updated_at"] = datetime.utcnow()
+        updates[project_data.id] = (index, update_data)
+    
+    # One atomic find-and-update per project: each returns the project as it
+    # was just before this write, so the stats deltas match what was written
+    # even when another write to the same project lands concurrently
+    results = await asyncio.gather(*(
+        repositories.projects.update(project_id, current_user.id, update_data, {"challenge_id": challenge_id})
+        for project_id, (_, update_data) in updates.items()
+    ), return_exceptions=True)
+    
+    before_docs, after_docs, rechecked = [], [], []
+    for (project_id, (index, update_data)), before in zip(updates.items(), results):
+        if isinstance(before, PyMongoError):
+            errors.append(BatchItemError(index=index, id=project_id, error=str(before)))
+            continue
+        if isinstance(before, BaseException):
+            raise before
+        if not before:
+            errors.append(BatchItemError(index=index, id=project_id, error="Project not found"))
+            continue
+        before_docs.append(before)
+        after_docs.append({**before, **update_data})
+        if "repository_url" in update_data or "demo_url" in update_data:
+            rechecked.append(project_id)
+    
+    if after_docs:
+        await user_stats.apply(current_user.id, batch_counters(before_docs), batch_counters(after_docs))
+        await user_data_changed(current_user.id)
+        if rechecked:
+            background_tasks.add_task(monitor_projects_urls, rechecked)
+    
+    return ProjectBatchResult(
+        projects=[Project(**doc) for doc in after_docs],
+        errors=sorted(errors, key=lambda e: e.index)
+    )
+
+# Export Routes
+async def export_lines(user_id: str, batch_size: int):
+    """Yield the user's challenges then projects as NDJSON, one cursor batch in memory at a time"""
+    for record_type, repository in (("challenge", repositories.challenges), ("project", repositories.projects)):
+        async for doc in repository.stream(user_id, batch_size):
+            yield dumps({"type": record_type, "data": doc}) + b"\n"
+
+async def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+@api_router.get("/export")
+async def export_account(
+    batch_size: int = Query(500, ge=1, le=10000),
+    gzip: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    filename = f"challenge-tracker-export-{datetime.utcnow():%Y%m%d}.ndjson"
+    body = export_lines(current_user.id, batch_size)
+    media_type = "application/x-ndjson"
+    if gzip:
+        body = gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Dashboard Routes
+@api_router.get("/dashboard")
+async def get_dashboard(
+    fields: Optional[str] = None,
+    etag: str = Depends(conditional_etag),
+    current_user: User = Depends(get_current_user)
+):
+    # ?fields= selects the fields of the recent challenge and project items
+    selected = parse_fields(fields, Challenge, Project)
+    
+    # Only the full dashboard is cached; it's the one clients poll
+    if fields is None:
+        body = await dashboard_cache.get(current_user.id, etag)
+        if body is not None:
+            return Response(body, media_type="application/json", headers=etag_headers(etag))
+    
+    # Stats come from the incrementally maintained read model
+    stats, recent_challenges, recent_projects = await asyncio.gather(
+        user_stats.get(current_user.id),
+        repositories.challenges.recent(current_user.id, 5, mongo_projection(Challenge, selected)),
+        repositories.projects.recent(current_user.id, 5, mongo_projection(Project, selected))
+    )
     
-    total_projects = len(projects)
-    completed_projects = len([p for p in projects if p["status"] == "completed"])
+    total_projects = stats["projects"]["total"]
     
     # Calculate overall progress
     if total_projects > 0:
-        total_progress = sum(p.get("progress_percentage", 0) for p in projects)
-        overall_progress = total_progress / total_projects
+        overall_progress = stats["projects"]["progress_sum"] / total_projects
     else:
         overall_progress = 0
     
-    # Get tech stack distribution
-    tech_stack_counts = {}
-    for project in projects:
-        for tech in project.get("tech_stack", []):
-            tech_stack_counts[tech] = tech_stack_counts.get(tech, 0) + 1
-    
-    # Serialize user data
-    user_data = serialize_mongo_doc(current_user.dict())
-    
-    return {
-        "user": user_data,
+    # Returned as a response directly so the documents are serialized in one pass
+    response = MongoJSONResponse({
+        "user": current_user,
         "stats": {
-            "total_challenges": total_challenges,
-            "active_challenges": active_challenges,
-            "completed_challenges": completed_challenges,
+            "total_challenges": stats["challenges"]["total"],
+            "active_challenges": stats["challenges"]["active"],
+            "completed_challenges": stats["challenges"]["completed"],
             "total_projects": total_projects,
-            "completed_projects": completed_projects,
+            "completed_projects": stats["projects"]["completed"],
             "overall_progress": round(overall_progress, 1)
         },
-        "recent_challenges": challenges[-5:] if challenges else [],
-        "recent_projects": projects[-5:] if projects else [],
-        "tech_stack_distribution": tech_stack_counts
-    }
+        "recent_challenges": recent_challenges[::-1],
+        "recent_projects": recent_projects[::-1],
+        "tech_stack_distribution": stats["tech_stack"]
+    }, headers=etag_headers(etag))
+    if fields is None:
+        await dashboard_cache.set(current_user.id, etag, response.body)
+    return response
 
 # Health check
 @api_router.get("/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
+# Admin Routes
+@api_router.get("/admin/cache-stats")
+async def get_cache_stats(admin_user: User = Depends(get_admin_user)):
+    return {
+        "session_cache": session_cache.stats(),
+        "revoked_sessions": len(revoked_sessions),
+        "dashboard_cache": dashboard_cache.stats(),
+        "token_filter": token_filter.stats(),
+        "access_tokens": access_tokens.stats() if access_tokens is not None else None
+    }
+
+@api_router.get("/admin/index-stats")
+async def get_index_stats(admin_user: User = Depends(get_admin_user)):
+    if db is None:
+        raise HTTPException(status_code=404, detail="Index stats need the mongo storage engine")
+    return MongoJSONResponse(await index_usage(db))
+
+@api_router.get("/admin/mongo-stats")
+async def get_mongo_stats(admin_user: User = Depends(get_admin_user)):
+    if db is None:
+        raise HTTPException(status_code=404, detail="Mongo stats need the mongo storage engine")
+    return MongoJSONResponse(command_monitor.stats())
+
+@api_router.post("/admin/mongo-stats/reset")
+async def reset_mongo_stats(admin_user: User = Depends(get_admin_user)):
+    command_monitor.reset()
+    return {"message": "Mongo command stats reset"}
+
+@api_router.post("/admin/user-stats/rebuild")
+async def rebuild_user_stats(user_id: Optional[str] = None, admin_user: User = Depends(get_admin_user)):
+    rebuilt = await user_stats.rebuild(user_id)
+    # The dashboards of these users changed without a write; expire their ETags and cached bodies
+    if rebuilt:
+        await user_data_changed(*rebuilt)
+    return {"rebuilt": len(rebuilt)}
+
+@api_router.get("/admin/url-monitor")
+async def get_url_monitor_stats(admin_user: User = Depends(get_admin_user)):
+    return {
+        "sweep_enabled": URL_SWEEP_ENABLED,
+        "sweep_interval": url_sweeper.interval,
+        "stale_after": url_sweeper.stale_after,
+        "last_sweep": url_sweeper.last_sweep
+    }
+
+# Prometheus scrape endpoint, outside /api
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return metrics_response()
+
+@app.exception_handler(NotModified)
+async def not_modified_handler(request: Request, exc: NotModified):
+    return Response(status_code=304, headers=etag_headers(exc.etag))
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -483,8 +902,12 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Added last so it wraps everything else, CORS included
+app.add_middleware(PrometheusMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -492,6 +915,35 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_db_indexes():
+    if client is not None:
+        command_monitor.start(client)
+    await repositories.start()
+
+@app.on_event("startup")
+async def startup_http_clients():
+    global auth_http_session
+    auth_http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=EMERGENT_AUTH_MAX_CONNECTIONS),
+        timeout=aiohttp.ClientTimeout(
+            total=EMERGENT_AUTH_TIMEOUT,
+            connect=EMERGENT_AUTH_CONNECT_TIMEOUT
+        )
+    )
+    await url_monitor.start()
+    if URL_SWEEP_ENABLED:
+        url_sweeper.start()
+    token_filter.start()
+    revoked_sessions.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    if auth_http_session is not None:
+        await auth_http_session.close()
+    await url_sweeper.stop()
+    await token_filter.stop()
+    await revoked_sessions.stop()
+    await url_monitor.close()
+    await dashboard_cache.close()
+    await repositories.close()
\ No newline at end of file
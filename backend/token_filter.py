@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for a capacity and false-positive rate"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def estimated_error_rate(self) -> float:
+        """False-positive rate expected at the current number of items"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+
+class TokenFilter:
+    """Rejects bearer tokens that can't be a session before they cost a database lookup
+
+    Two layers, checked in order:
+
+    - a negative cache of tokens the database recently rejected
+    - optionally, a Bloom filter of every unexpired session token, rebuilt
+      every rebuild_interval seconds and fed the sessions this process creates.
+      A token it has never seen can't be valid; one it has seen may still be
+      a false positive, which the lookup then rejects.
+
+    The Bloom filter only knows sessions created here or present at the last
+    rebuild, so with several app instances behind a load balancer a new
+    session may be rejected by the others until their next rebuild; keep the
+    interval short there, or leave the filter off.
+    """
+
+    def __init__(
+        self,
+        tokens: Callable[[datetime], AsyncIterator[str]],
+        negative_cache_size: int = 100000,
+        negative_cache_ttl: float = 300.0,
+        bloom_enabled: bool = False,
+        bloom_capacity: int = 1000000,
+        bloom_error_rate: float = 0.001,
+        rebuild_interval: float = 300.0,
+        on_rejection: Optional[Callable[[str, bool], None]] = None
+    ):
+        self.tokens = tokens
+        self.rejected = TTLCache(maxsize=negative_cache_size, ttl=negative_cache_ttl)
+        self.bloom_enabled = bloom_enabled
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.rebuild_interval = rebuild_interval
+        self.on_rejection = on_rejection
+        self.bloom: Optional[BloomFilter] = None
+        self._building: Optional[BloomFilter] = None
+        self._task: Optional[asyncio.Task] = None
+        self.rejections = {"negative_cache": 0, "bloom_filter": 0, "lookup": 0}
+        self.bloom_false_positives = 0
+        self.last_rebuild: Optional[Dict[str, Any]] = None
+
+    def check(self, token: str) -> Optional[str]:
+        """The layer that rejects the token, or None if it needs a lookup"""
+        if self.rejected.get(token):
+            reason = "negative_cache"
+        elif self.bloom is not None and token not in self.bloom:
+            reason = "bloom_filter"
+        else:
+            return None
+        self._count_rejection(reason, False)
+        return reason
+
+    def reject(self, token: str, stored: bool = False) -> None:
+        """Remember a token the lookup rejected
+
+        stored is True when the session existed but was unusable (expired, or
+        its user is gone); the Bloom filter was right to let those through.
+        """
+        self.rejected.set(token, True)
+        false_positive = self.bloom is not None and not stored
+        if false_positive:
+            self.bloom_false_positives += 1
+        self._count_rejection("lookup", false_positive)
+
+    def add(self, token: str) -> None:
+        """A session was created with this token"""
+        self.rejected.pop(token)
+        for bloom in (self.bloom, self._building):
+            if bloom is not None:
+                bloom.add(token)
+
+    def _count_rejection(self, reason: str, false_positive: bool) -> None:
+        self.rejections[reason] += 1
+        if self.on_rejection is not None:
+            self.on_rejection(reason, false_positive)
+
+    async def rebuild(self) -> Optional[Dict[str, Any]]:
+        """Replace the Bloom filter with one built from the sessions currently stored"""
+        if not self.bloom_enabled:
+            return None
+        started = time.perf_counter()
+        self._building = BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+        try:
+            async for token in self.tokens(datetime.utcnow()):
+                self._building.add(token)
+            bloom, self.bloom = self._building, self._building
+        finally:
+            self._building = None
+
+        if bloom.count > bloom.capacity:
+            logger.warning("Token Bloom filter holds %d tokens, over its capacity of %d; raise TOKEN_BLOOM_CAPACITY",
+                           bloom.count, bloom.capacity)
+        self.last_rebuild = {
+            "at": datetime.utcnow().isoformat(),
+            "duration_seconds": round(time.perf_counter() - started, 3),
+            "tokens": bloom.count,
+        }
+        return self.last_rebuild
+
+    def start(self) -> None:
+        if self.bloom_enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.rebuild()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Token Bloom filter rebuild failed")
+            await asyncio.sleep(self.rebuild_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        # Of the invalid tokens that reached the filter, the share it let through
+        bloom_checked = self.rejections["bloom_filter"] + self.bloom_false_positives
+        return {
+            "negative_cache": self.rejected.stats(),
+            "rejections": dict(self.rejections),
+            "bloom_filter": {
+                "enabled": self.bloom_enabled,
+                "ready": self.bloom is not None,
+                "tokens": self.bloom.count if self.bloom else 0,
+                "capacity": self.bloom_capacity,
+                "size_bytes": len(self.bloom._bits) if self.bloom else 0,
+                "estimated_false_positive_rate": round(self.bloom.estimated_error_rate(), 6) if self.bloom else None,
+                "false_positives": self.bloom_false_positives,
+                "observed_false_positive_rate": (
+                    round(self.bloom_false_positives / bloom_checked, 6) if bloom_checked else None
+                ),
+                "last_rebuild": self.last_rebuild,
+            },
+        }
@@ -0,0 +1,314 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Statuses servers use to say they don't support HEAD on a resource
+HEAD_REJECTED_STATUSES = {403, 405, 501}
+
+# Fields of a stored url_status entry needed to revalidate it on the next check
+VALIDATOR_FIELDS = ("url", "etag", "last_modified", "method")
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def _timing_trace_config() -> aiohttp.TraceConfig:
+    """Trace hooks that record a per-check latency breakdown into trace_request_ctx
+
+    DNS and connect time accumulate over every request a check makes (e.g. a
+    HEAD followed by a GET fallback); connect includes the TLS handshake for
+    https URLs since aiohttp performs both in one step. ttfb is measured for
+    the last request, from its headers having been sent on the connection
+    to receiving the response headers, so it never overlaps dns or connect.
+    """
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_headers_sent(session, ctx, params):
+        # Fires per redirect hop; the last hop's is the one ttfb is measured from
+        ctx.headers_sent = time.perf_counter()
+
+    async def on_dns_resolvehost_start(session, ctx, params):
+        ctx.dns_start = time.perf_counter()
+
+    async def on_dns_resolvehost_end(session, ctx, params):
+        timings = ctx.trace_request_ctx
+        timings["dns_ms"] = timings.get("dns_ms", 0.0) + _elapsed_ms(ctx.dns_start)
+
+    async def on_dns_cache_hit(session, ctx, params):
+        ctx.trace_request_ctx.setdefault("dns_ms", 0.0)
+
+    async def on_connection_create_start(session, ctx, params):
+        ctx.connect_start = time.perf_counter()
+
+    async def on_connection_create_end(session, ctx, params):
+        timings = ctx.trace_request_ctx
+        timings["connect_ms"] = timings.get("connect_ms", 0.0) + _elapsed_ms(ctx.connect_start)
+
+    async def on_connection_reuseconn(session, ctx, params):
+        ctx.trace_request_ctx.setdefault("connect_ms", 0.0)
+        ctx.trace_request_ctx["connection_reused"] = True
+
+    async def on_request_end(session, ctx, params):
+        ctx.trace_request_ctx["ttfb_ms"] = _elapsed_ms(ctx.headers_sent)
+
+    trace_config.on_request_headers_sent.append(on_request_headers_sent)
+    trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
+
+
+class URLMonitor:
+    """Checks project URLs over one long-lived, keep-alive aiohttp session"""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_connections_per_host: int = 10,
+        dns_cache_ttl: int = 300,
+        concurrency: int = 50,
+        timeout: float = 10.0,
+        keepalive_timeout: float = 30.0,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.on_result = on_result
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def start(self) -> None:
+        if self._session is not None and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trace_configs=[_timing_trace_config()]
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def check_url_status(self, url: str, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Check if URL is accessible and return status info
+
+        Probes with HEAD first, falling back to GET for servers that reject
+        it (remembered in "method" once such a GET succeeds), and
+        revalidates with the ETag / Last-Modified from the previous check of
+        the same URL so unchanged pages answer 304 without a body.
+        """
+        await self.start()
+        if not previous or previous.get("url") != url:
+            previous = {}
+
+        headers = {}
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+
+        async with self._semaphore:
+            timings: Dict[str, Any] = {}
+            started = time.perf_counter()
+            try:
+                method = "HEAD" if previous.get("method", "HEAD") == "HEAD" else "GET"
+                response = await self._request(method, url, headers, timings)
+                if method == "HEAD" and response.status in HEAD_REJECTED_STATUSES:
+                    response = await self._request("GET", url, headers, timings)
+                    # Only a GET that works shows HEAD was the problem; otherwise
+                    # the server may just be down, so HEAD is tried again next time
+                    if response.status < 400:
+                        method = "GET"
+                timings = self._timings(timings, started)
+
+                not_modified = response.status == 304
+                result = {
+                    "url": url,
+                    "status_code": response.status,
+                    "accessible": response.status < 400,
+                    "not_modified": not_modified,
+                    "method": method,
+                    "etag": response.headers.get("ETag") or (previous.get("etag") if not_modified else None),
+                    "last_modified": response.headers.get("Last-Modified") or (
+                        previous.get("last_modified") if not_modified else None
+                    ),
+                    "response_time": timings["total_ms"],
+                    "timings": timings,
+                    "checked_at": datetime.utcnow().isoformat()
+                }
+            except Exception as e:
+                timings = self._timings(timings, started)
+                result = {
+                    "url": url,
+                    "status_code": None,
+                    "accessible": False,
+                    "error": str(e),
+                    "response_time": timings["total_ms"],
+                    "timings": timings,
+                    "checked_at": datetime.utcnow().isoformat()
+                }
+
+        if self.on_result is not None:
+            self.on_result(result)
+        return result
+
+    async def _request(
+        self, method: str, url: str, headers: Dict[str, str], timings: Dict[str, Any]
+    ) -> aiohttp.ClientResponse:
+        """Issue a request and release it without reading the body"""
+        async with self._session.request(
+            method, url, headers=headers, allow_redirects=True, trace_request_ctx=timings
+        ) as response:
+            return response
+
+    @staticmethod
+    def _timings(raw: Dict[str, Any], started: float) -> Dict[str, Any]:
+        return {
+            "dns_ms": raw.get("dns_ms"),
+            "connect_ms": raw.get("connect_ms"),
+            "ttfb_ms": raw.get("ttfb_ms"),
+            "total_ms": _elapsed_ms(started),
+            "connection_reused": raw.get("connection_reused", False)
+        }
+
+    async def check_project_urls(self, project: Dict[str, Any]) -> Dict[str, Any]:
+        """Check a project's repository and demo URLs concurrently"""
+        previous = project.get("url_status") or {}
+        targets = {
+            key: project[field]
+            for key, field in (("repository", "repository_url"), ("demo", "demo_url"))
+            if project.get(field)
+        }
+        results = await asyncio.gather(*(
+            self.check_url_status(url, previous.get(key)) for key, url in targets.items()
+        ))
+        return dict(zip(targets.keys(), results))
+
+
+class URLSweeper:
+    """Periodically re-checks projects whose URL status has gone stale"""
+
+    def __init__(
+        self,
+        projects,
+        monitor: URLMonitor,
+        interval: float = 300.0,
+        stale_after: float = 3600.0,
+        batch_size: int = 500,
+        on_batch_checked: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+    ):
+        self.projects = projects
+        self.monitor = monitor
+        self.interval = interval
+        self.stale_after = stale_after
+        self.batch_size = batch_size
+        self.on_batch_checked = on_batch_checked
+        self.last_sweep: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("URL sweep failed")
+            await asyncio.sleep(self.interval)
+
+    async def check_projects(self, projects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Check a batch of projects concurrently and store every result in one write"""
+        statuses = await asyncio.gather(*(self.monitor.check_project_urls(p) for p in projects))
+        await self.projects.set_url_statuses(
+            [(project["id"], url_status) for project, url_status in zip(projects, statuses)], datetime.utcnow()
+        )
+        if self.on_batch_checked is not None:
+            await self.on_batch_checked(projects)
+        return statuses
+
+    async def check_project_ids(self, project_ids: List[str]) -> None:
+        """Check the given projects now rather than waiting for them to go stale
+
+        A project whose URLs were all removed gets an empty url_status, so the
+        result of its last check doesn't linger.
+        """
+        for start in range(0, len(project_ids), self.batch_size):
+            batch = await self.projects.for_url_check(project_ids[start:start + self.batch_size])
+            if batch:
+                await self.check_projects(batch)
+
+    async def sweep(self) -> Dict[str, Any]:
+        """Check every stale project once, persisting each batch in one write"""
+        started = time.perf_counter()
+        started_at = datetime.utcnow()
+        cutoff = started_at - timedelta(seconds=self.stale_after)
+        projects_checked = 0
+        urls_checked = 0
+        check_times = []
+
+        while True:
+            batch = await self.projects.stale_for_url_check(cutoff, self.batch_size)
+            if not batch:
+                break
+
+            statuses = await self.check_projects(batch)
+
+            projects_checked += len(batch)
+            urls_checked += sum(len(url_status) for url_status in statuses)
+            check_times.extend(
+                status["response_time"] for url_status in statuses for status in url_status.values()
+            )
+            if len(batch) < self.batch_size:
+                break
+
+        duration = time.perf_counter() - started
+        self.last_sweep = {
+            "started_at": started_at.isoformat(),
+            "duration_seconds": round(duration, 3),
+            "projects_checked": projects_checked,
+            "urls_checked": urls_checked,
+            "projects_per_second": round(projects_checked / duration, 1) if duration else 0.0,
+            "urls_per_second": round(urls_checked / duration, 1) if duration else 0.0,
+            "avg_check_ms": round(sum(check_times) / len(check_times), 2) if check_times else None,
+            "max_check_ms": max(check_times) if check_times else None
+        }
+        if projects_checked:
+            logger.info("URL sweep finished: %s", self.last_sweep)
+        return self.last_sweep
@@ -0,0 +1,226 @@
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Rebuilds of one user's stats to try before giving up on storing them
+REBUILD_ATTEMPTS = 5
+
+# Tech names become field names under "tech_stack", so characters Mongo
+# treats specially in paths are swapped for look-alikes on write
+_KEY_ESCAPES = (("$", "\uff04"), (".", "\uff0e"))
+
+
+def _encode_key(key: str) -> str:
+    for raw, escaped in _KEY_ESCAPES:
+        key = key.replace(raw, escaped)
+    return key
+
+
+def _decode_key(key: str) -> str:
+    for raw, escaped in reversed(_KEY_ESCAPES):
+        key = key.replace(escaped, raw)
+    return key
+
+
+def _value(field: Any) -> Any:
+    """Enum members (from pydantic models) and plain strings (from Mongo) alike"""
+    return getattr(field, "value", field)
+
+
+def challenge_counters(challenge: Optional[Dict[str, Any]]) -> Counter:
+    """Counters a single challenge contributes to its owner's stats"""
+    counters = Counter()
+    if challenge:
+        counters["challenges.total"] += 1
+        counters[f"challenges.{_value(challenge.get('status', 'active'))}"] += 1
+    return counters
+
+
+def project_counters(project: Optional[Dict[str, Any]]) -> Counter:
+    """Counters a single project contributes to its owner's stats"""
+    counters = Counter()
+    if project:
+        counters["projects.total"] += 1
+        counters["projects.progress_sum"] += project.get("progress_percentage") or 0
+        if _value(project.get("status")) == "completed":
+            counters["projects.completed"] += 1
+        for tech in project.get("tech_stack") or []:
+            if tech:
+                counters[f"tech_stack.{_encode_key(tech)}"] += 1
+    return counters
+
+
+def empty_stats(user_id: str) -> Dict[str, Any]:
+    return {
+        "user_id": user_id,
+        "challenges": {"total": 0, "active": 0, "paused": 0, "completed": 0},
+        "projects": {"total": 0, "completed": 0, "progress_sum": 0},
+        "tech_stack": {}
+    }
+
+
+def add_counters(stats: Dict[str, Any], counters: Counter) -> Dict[str, Any]:
+    """Add "group.name" counters into a nested stats document, in place"""
+    for key, count in counters.items():
+        group, name = key.split(".", 1)
+        stats[group][name] = stats[group].get(name, 0) + count
+    return stats
+
+
+def present_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode tech names, most used first, leaving out ones no project uses any more"""
+    stats["tech_stack"] = {
+        _decode_key(tech): count
+        for tech, count in sorted(stats.get("tech_stack", {}).items(), key=lambda item: (-item[1], item[0]))
+        if count > 0
+    }
+    return stats
+
+
+class UserStats:
+    """Per-user dashboard read model kept current with $inc on every write
+
+    Every apply also bumps the document's "version". A rebuild reads the
+    version before aggregating and only replaces the document if the version
+    is unchanged, so an increment that commits while it aggregates is never
+    overwritten; the rebuild is retried instead.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.user_stats
+
+    async def apply(self, user_id: str, before: Counter, after: Counter) -> None:
+        """Apply the difference between a document's old and new counters
+
+        A missing stats document is created holding just the increments and
+        flagged "partial"; the next read rebuilds it from the source
+        collections, which also covers accounts that predate this model.
+        """
+        inc = {key: after[key] - before[key] for key in set(before) | set(after) if after[key] != before[key]}
+        if inc:
+            await self.collection.update_one(
+                {"user_id": user_id},
+                {
+                    "$inc": {**inc, "version": 1},
+                    "$set": {"updated_at": datetime.utcnow()},
+                    "$setOnInsert": {"partial": True}
+                },
+                upsert=True
+            )
+
+    async def get(self, user_id: str) -> Dict[str, Any]:
+        stats = await self.collection.find_one({"user_id": user_id}, {"_id": 0})
+        if stats is None or stats.get("partial"):
+            stats, _ = await self._rebuild_user(user_id)
+        return present_stats(stats)
+
+    async def rebuild(self, user_id: Optional[str] = None) -> List[str]:
+        """Recompute stats from the source collections for one user, or all users
+
+        Returns the ids of the users whose stats were rewritten or removed,
+        whose ETags and cached dashboards the caller must expire.
+        """
+        if user_id:
+            _, written = await self._rebuild_user(user_id)
+            return [user_id] if written else []
+
+        versions = {
+            doc["user_id"]: doc.get("version")
+            async for doc in self.collection.find({}, {"_id": 0, "user_id": 1, "version": 1})
+        }
+        stats = await self._aggregate()
+
+        # Users whose challenges and projects are all gone. A document a racing
+        # write creates meanwhile may go too; the next read rebuilds it.
+        await self.collection.delete_many({"user_id": {"$nin": list(stats)}})
+        removed = [uid for uid in versions if uid not in stats]
+        if not stats:
+            return removed
+
+        now = datetime.utcnow()
+        await self.collection.bulk_write(
+            [
+                ReplaceOne(
+                    {"user_id": uid, "version": versions[uid]},
+                    {**doc, "version": versions[uid], "rebuilt_at": now}
+                ) if uid in versions else
+                UpdateOne({"user_id": uid}, {"$setOnInsert": {**doc, "rebuilt_at": now}}, upsert=True)
+                for uid, doc in stats.items()
+            ],
+            ordered=False
+        )
+
+        # Documents a write changed during the aggregation kept their old state; redo those one by one
+        written = set(stats)
+        async for doc in self.collection.find(
+            {"user_id": {"$in": list(stats)}, "rebuilt_at": {"$ne": now}}, {"_id": 0, "user_id": 1}
+        ):
+            _, rebuilt = await self._rebuild_user(doc["user_id"])
+            if not rebuilt:
+                written.discard(doc["user_id"])
+        return sorted(written) + removed
+
+    async def _rebuild_user(self, user_id: str) -> Tuple[Dict[str, Any], bool]:
+        """Rebuild one user's document; returns the stats and whether they were stored"""
+        for _ in range(REBUILD_ATTEMPTS):
+            seed = await self.collection.find_one_and_update(
+                {"user_id": user_id},
+                {"$setOnInsert": {"partial": True}},
+                projection={"_id": 0, "version": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            version = seed.get("version")
+            stats = (await self._aggregate(user_id))[user_id]
+            stats.update(version=version, rebuilt_at=datetime.utcnow())
+            result = await self.collection.replace_one({"user_id": user_id, "version": version}, stats)
+            if result.matched_count:
+                return stats, True
+        logger.warning("Stats of user %s changed during %d rebuilds; not stored", user_id, REBUILD_ATTEMPTS)
+        return stats, False
+
+    async def _aggregate(self, user_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Stats documents computed from the source collections, by user"""
+        match = [{"$match": {"user_id": user_id}}] if user_id else []
+        stats: Dict[str, Dict[str, Any]] = {}
+
+        if user_id:
+            stats[user_id] = empty_stats(user_id)
+
+        async for bucket in self.db.challenges.aggregate(match + [
+            {"$group": {"_id": {"user_id": "$user_id", "status": "$status"}, "count": {"$sum": 1}}}
+        ]):
+            doc = stats.setdefault(bucket["_id"]["user_id"], empty_stats(bucket["_id"]["user_id"]))
+            doc["challenges"]["total"] += bucket["count"]
+            doc["challenges"][bucket["_id"]["status"]] = bucket["count"]
+
+        async for bucket in self.db.projects.aggregate(match + [
+            {"$group": {
+                "_id": "$user_id",
+                "total": {"$sum": 1},
+                "completed": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}},
+                "progress_sum": {"$sum": {"$ifNull": ["$progress_percentage", 0]}}
+            }}
+        ]):
+            doc = stats.setdefault(bucket["_id"], empty_stats(bucket["_id"]))
+            doc["projects"] = {
+                "total": bucket["total"],
+                "completed": bucket["completed"],
+                "progress_sum": bucket["progress_sum"]
+            }
+
+        async for bucket in self.db.projects.aggregate(match + [
+            {"$unwind": "$tech_stack"},
+            {"$match": {"tech_stack": {"$nin": [None, ""]}}},
+            {"$group": {"_id": {"user_id": "$user_id", "tech": "$tech_stack"}, "count": {"$sum": 1}}}
+        ]):
+            doc = stats.setdefault(bucket["_id"]["user_id"], empty_stats(bucket["_id"]["user_id"]))
+            doc["tech_stack"][_encode_key(bucket["_id"]["tech"])] = bucket["count"]
+
+        return stats
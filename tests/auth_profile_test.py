@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Exchanging the same Emergent Auth session id twice logs in both times
+
+See conftest.py for the in-process app set-up.
+"""
+import os
+import sys
+import unittest
+import uuid
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tests.conftest import AppTestCase, server  # noqa: E402
+
+
+class FakeAuthResponse:
+    status = 200
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    async def json(self, content_type=None):
+        return self.profile
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeAuthSession:
+    """Stands in for the Emergent Auth client: every session id maps to the same profile"""
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def get(self, url, headers=None):
+        return FakeAuthResponse(self.profile)
+
+
+class AuthProfileTests(AppTestCase):
+    async def test_repeated_exchange_reuses_the_session(self):
+        email = f"{uuid.uuid4()}@example.com"
+        auth_session = FakeAuthSession({"email": email, "name": "Repeat", "session_token": f"token-{uuid.uuid4()}"})
+
+        # React.StrictMode runs the profile effect twice with the same session id
+        with mock.patch.object(server, "auth_http_session", auth_session):
+            first = await self.client.post("/api/auth/profile", headers={"X-Session-ID": "session-id"})
+            second = await self.client.post("/api/auth/profile", headers={"X-Session-ID": "session-id"})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.json()["session_token"], second.json()["session_token"])
+        self.assertEqual(first.json()["user"]["id"], second.json()["user"]["id"])
+
+        response = await self.client.get(
+            "/api/challenges", headers={"Authorization": f"Bearer {second.json()['session_token']}"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
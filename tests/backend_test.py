@@ -356,6 +356,156 @@ class BackendTests(unittest.TestCase):
         self.assertEqual(response.status_code, 404)
         print("✅ Project deletion confirmed")
 
+    def test_13_paginate_challenges(self):
+        """Test keyset pagination of the challenge list"""
+        headers = {"Authorization": f"Bearer {self.auth_token}"}
+        for i in range(3):
+            response = requests.post(
+                f"{API_URL}/challenges",
+                headers=headers,
+                json={"title": f"Paged Challenge {i}", "description": "Pagination test"}
+            )
+            self.assertEqual(response.status_code, 200)
+        
+        seen_ids = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = requests.get(f"{API_URL}/challenges", headers=headers, params=params)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page), 2)
+            seen_ids.extend(challenge["id"] for challenge in page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        
+        self.assertEqual(len(seen_ids), len(set(seen_ids)))
+        self.assertGreaterEqual(len(seen_ids), 4)
+        self.assertIn(BackendTests.challenge_id, seen_ids)
+        
+        response = requests.get(f"{API_URL}/challenges", headers=headers, params={"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+        print("✅ Challenge pagination is working")
+    
+    def test_14_conditional_get(self):
+        """Test ETag / If-None-Match handling on the dashboard"""
+        headers = {"Authorization": f"Bearer {self.auth_token}"}
+        response = requests.get(f"{API_URL}/dashboard", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers.get("ETag")
+        self.assertIsNotNone(etag)
+        
+        response = requests.get(f"{API_URL}/dashboard", headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        
+        # Any write for the user changes the ETag
+        response = requests.post(
+            f"{API_URL}/challenges",
+            headers=headers,
+            json={"title": "ETag Challenge", "description": "Invalidates cached reads"}
+        )
+        self.assertEqual(response.status_code, 200)
+        response = requests.get(f"{API_URL}/dashboard", headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers.get("ETag"), etag)
+        print("✅ Conditional GET is working")
+
+    def test_15_dashboard_cache(self):
+        """Test that a cached dashboard is dropped as soon as the user writes"""
+        headers = {"Authorization": f"Bearer {self.auth_token}"}
+        first = requests.get(f"{API_URL}/dashboard", headers=headers)
+        second = requests.get(f"{API_URL}/dashboard", headers=headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json(), second.json())
+
+        response = requests.post(
+            f"{API_URL}/challenges",
+            headers=headers,
+            json={"title": "Cache Challenge", "description": "Invalidates the cached dashboard"}
+        )
+        self.assertEqual(response.status_code, 200)
+        response = requests.get(f"{API_URL}/dashboard", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["stats"]["total_challenges"],
+            first.json()["stats"]["total_challenges"] + 1
+        )
+        print("✅ Dashboard cache invalidation is working")
+
+    def test_16_batch_projects(self):
+        """Test batch project create and update with per-item errors"""
+        headers = {"Authorization": f"Bearer {self.auth_token}"}
+        url = f"{API_URL}/challenges/{BackendTests.challenge_id}/projects:batch"
+        response = requests.post(url, headers=headers, json=[
+            {"title": "Batch One", "description": "First", "tech_stack": ["Go"]},
+            {"title": "Missing description"},
+            {"title": "Batch Two", "description": "Second", "status": "completed"}
+        ])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([p["title"] for p in data["projects"]], ["Batch One", "Batch Two"])
+        self.assertEqual([e["index"] for e in data["errors"]], [1])
+
+        project_ids = [p["id"] for p in data["projects"]]
+        response = requests.put(url, headers=headers, json=[
+            {"id": project_ids[0], "progress_percentage": 75},
+            {"id": "does-not-exist", "title": "Nope"}
+        ])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["projects"][0]["progress_percentage"], 75)
+        self.assertEqual(data["errors"][0]["error"], "Project not found")
+        print("✅ Batch project endpoints are working")
+
+    def test_17_invalid_token_rejected(self):
+        """Test that a bogus token stays rejected once it is negatively cached"""
+        headers = {"Authorization": f"Bearer invalid-{uuid.uuid4()}"}
+        for _ in range(3):
+            response = requests.get(f"{API_URL}/challenges", headers=headers)
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.json()["detail"], "Invalid session")
+
+        # A real session is still accepted alongside
+        response = requests.get(f"{API_URL}/challenges", headers={"Authorization": f"Bearer {self.auth_token}"})
+        self.assertEqual(response.status_code, 200)
+        print("✅ Invalid tokens are rejected")
+
+    def test_18_access_token(self):
+        """Test minting an access token from the session and using it in its place"""
+        response = requests.post(f"{API_URL}/auth/refresh", headers={"Authorization": f"Bearer {self.auth_token}"})
+        if response.status_code == 404:
+            self.skipTest("Access tokens are not enabled on this deployment")
+        self.assertEqual(response.status_code, 200)
+        access_token = response.json()["access_token"]
+
+        response = requests.get(f"{API_URL}/challenges", headers={"Authorization": f"Bearer {access_token}"})
+        self.assertEqual(response.status_code, 200)
+
+        # Only the session token can refresh
+        response = requests.post(f"{API_URL}/auth/refresh", headers={"Authorization": f"Bearer {access_token}"})
+        self.assertEqual(response.status_code, 401)
+        print("✅ Access tokens are working")
+
+    def test_99_logout(self):
+        """Test that logout invalidates the session, including any cached copy"""
+        headers = {"Authorization": f"Bearer {self.auth_token}"}
+        
+        # Warm the session cache first
+        response = requests.get(f"{API_URL}/dashboard", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        
+        response = requests.post(f"{API_URL}/auth/logout", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["message"], "Logged out successfully")
+        
+        response = requests.get(f"{API_URL}/dashboard", headers=headers)
+        self.assertEqual(response.status_code, 401)
+        print("✅ Logout endpoint is working")
+
 
 if __name__ == "__main__":
     # Run the tests in order
@@ -0,0 +1,50 @@
+"""Shared set-up for the in-process tests
+
+These tests run the app on the memory storage engine, so no MongoDB or
+deployed backend is needed. The environment is patched here, before server is
+first imported: pytest loads this module ahead of every test module, and
+run_tests.py (or a test run directly) gets it through the test module's own
+import of AppTestCase.
+"""
+import os
+import sys
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+
+os.environ["STORAGE_ENGINE"] = "memory"
+os.environ.pop("MEMORY_STORE_PATH", None)
+os.environ.setdefault("URL_SWEEP_ENABLED", "false")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+import server  # noqa: E402
+
+
+class AppTestCase(unittest.IsolatedAsyncioTestCase):
+    """Starts the app and signs in a fresh user
+
+    Tests get the user's id, session id and token, ready-made bearer headers
+    and an httpx client bound to the app.
+    """
+
+    async def asyncSetUp(self):
+        await server.app.router.startup()
+        self.user_id = str(uuid.uuid4())
+        self.session_id = str(uuid.uuid4())
+        self.token = f"test-token-{uuid.uuid4()}"
+        await server.repositories.users.upsert_by_email({
+            "id": self.user_id, "email": f"{self.user_id}@example.com", "name": "Test User",
+            "created_at": datetime.utcnow()
+        })
+        await server.repositories.sessions.upsert_by_token({
+            "id": self.session_id, "user_id": self.user_id, "session_token": self.token,
+            "expires_at": datetime.utcnow() + timedelta(days=1), "created_at": datetime.utcnow()
+        })
+        self.headers = {"Authorization": f"Bearer {self.token}"}
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await server.app.router.shutdown()
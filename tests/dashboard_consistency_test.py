@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""In-process checks of dashboard ETags and caching under concurrent writes
+
+See conftest.py for the in-process app set-up.
+"""
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tests.conftest import AppTestCase, server  # noqa: E402
+
+
+class DashboardConsistencyTests(AppTestCase):
+    """A dashboard read racing a write must never pair the new ETag with old stats"""
+
+    async def get_dashboard(self, etag=None):
+        headers = dict(self.headers)
+        if etag:
+            headers["If-None-Match"] = etag
+        return await self.client.get("/api/dashboard", headers=headers)
+
+    async def test_read_during_write_never_caches_or_revalidates_old_stats(self):
+        original_apply = server.user_stats.apply
+
+        async def slow_apply(*args):
+            # Widen the window between the document write and the stats update
+            await asyncio.sleep(0.05)
+            await original_apply(*args)
+
+        # Build the user's stats first; the race under test is with an existing read model
+        response = await self.get_dashboard()
+        self.assertEqual(response.json()["stats"]["total_challenges"], 0)
+
+        seen = {}
+        with mock.patch.object(server.user_stats, "apply", slow_apply):
+            write = asyncio.create_task(self.client.post(
+                "/api/challenges", headers=self.headers, json={"title": "Race", "description": "Concurrent write"}
+            ))
+            while not write.done():
+                response = await self.get_dashboard()
+                self.assertEqual(response.status_code, 200)
+                seen[response.headers["etag"]] = response.json()["stats"]["total_challenges"]
+                await asyncio.sleep(0.005)
+            self.assertEqual((await write).status_code, 200)
+
+        response = await self.get_dashboard()
+        self.assertEqual(response.json()["stats"]["total_challenges"], 1)
+
+        # An ETag the server still revalidates must have been issued with the post-write stats
+        for etag, total_challenges in seen.items():
+            response = await self.get_dashboard(etag)
+            if response.status_code == 304:
+                self.assertEqual(total_challenges, 1, f"{etag} revalidated with pre-write stats")
+
+    async def test_stats_rebuild_expires_etag_and_cached_dashboard(self):
+        await self.client.post("/api/challenges", headers=self.headers, json={"title": "One", "description": ""})
+        await server.user_stats.get(self.user_id)
+
+        # Counters that drifted from the documents, as the rebuild is there to repair
+        server.user_stats._stats[self.user_id]["challenges"]["total"] = 99
+        response = await self.get_dashboard()
+        self.assertEqual(response.json()["stats"]["total_challenges"], 99)
+        drifted_etag = response.headers["etag"]
+
+        with mock.patch.object(server, "ADMIN_EMAILS", {f"{self.user_id}@example.com"}):
+            response = await self.client.post(
+                "/api/admin/user-stats/rebuild", headers=self.headers, params={"user_id": self.user_id}
+            )
+        self.assertEqual(response.json(), {"rebuilt": 1})
+
+        response = await self.get_dashboard(drifted_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["stats"]["total_challenges"], 1)
+        response = await self.get_dashboard()
+        self.assertEqual(response.json()["stats"]["total_challenges"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
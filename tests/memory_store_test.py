@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""The memory storage engine: log replay, and parity with the Mongo repositories on mongomock"""
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from memory_store import MemoryRepositories  # noqa: E402
+from pagination import ListSort  # noqa: E402
+from repositories import MongoRepositories  # noqa: E402
+
+BASE_TIME = datetime(2024, 1, 1)
+
+
+def make_projects():
+    """Projects of two users across two challenges, with created_at ties to exercise the id tie-break"""
+    projects = []
+    for n in range(12):
+        projects.append({
+            "id": f"p{n:02d}", "user_id": "u1" if n % 4 else "u2", "challenge_id": "c1" if n % 3 else "c2",
+            "title": f"Project {n}", "description": "", "status": "planning", "progress_percentage": n,
+            "tech_stack": ["Go"], "created_at": BASE_TIME + timedelta(minutes=n // 3),
+            "repository_url": f"https://example.com/{n}" if n % 5 else None, "demo_url": None,
+            "last_url_check": BASE_TIME + timedelta(hours=n) if n % 2 else None, "url_status": {},
+        })
+    return projects
+
+
+class MemoryStoreReplayTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "store.log")
+        self.open_repositories = []
+
+    async def asyncTearDown(self):
+        for repositories in self.open_repositories:
+            repositories.store._log.close()
+        self.directory.cleanup()
+
+    async def start(self, **kwargs):
+        """A running engine on the test path; left unclosed, as after a crash"""
+        repositories = MemoryRepositories(self.path, **kwargs)
+        await repositories.start()
+        self.open_repositories.append(repositories)
+        return repositories
+
+    async def write_some(self, repositories):
+        for project in make_projects():
+            await repositories.projects.insert(project)
+        await repositories.projects.update("p01", "u1", {"title": "Renamed", "demo_url": "https://demo.example.com"})
+        await repositories.projects.delete("p02", "u1")
+        await repositories.projects.set_url_statuses([("p03", {"repository": {"status_code": 200}})], BASE_TIME)
+
+    async def assert_same_projects(self, expected, actual):
+        self.assertEqual(expected.projects.docs, actual.projects.docs)
+        self.assertEqual(
+            await expected.projects.stale_for_url_check(BASE_TIME + timedelta(days=1), 100),
+            await actual.projects.stale_for_url_check(BASE_TIME + timedelta(days=1), 100)
+        )
+        self.assertEqual(
+            await expected.projects.page({"user_id": "u1"}, 100), await actual.projects.page({"user_id": "u1"}, 100)
+        )
+
+    async def test_log_is_replayed_after_a_crash(self):
+        written = await self.start()
+        await self.write_some(written)
+
+        replayed = await self.start()
+        await self.assert_same_projects(written, replayed)
+        self.assertEqual(replayed.projects.docs["p01"]["title"], "Renamed")
+        self.assertNotIn("p02", replayed.projects.docs)
+
+    async def test_snapshot_and_log_are_replayed_together(self):
+        written = await self.start(compact_every=5)
+        await self.write_some(written)
+        self.assertTrue(os.path.exists(f"{self.path}.snapshot"))
+        self.assertLess(written.store._log_records, 5)
+
+        replayed = await self.start()
+        await self.assert_same_projects(written, replayed)
+
+    async def test_torn_final_record_is_ignored(self):
+        written = await self.start()
+        await self.write_some(written)
+        with open(self.path, "ab") as f:
+            f.write(b'{"op":"put","c":"projects","k":"torn","d":{"id":"to')
+
+        replayed = await self.start()
+        await self.assert_same_projects(written, replayed)
+
+        # Writes after the recovery must not land behind the torn record
+        await replayed.projects.update("p01", "u1", {"title": "After recovery"})
+        again = await self.start()
+        self.assertEqual(again.projects.docs["p01"]["title"], "After recovery")
+
+
+class MemoryMongoParityTests(unittest.IsolatedAsyncioTestCase):
+    """Both engines answer the same reads with the same documents"""
+
+    async def asyncSetUp(self):
+        self.memory = MemoryRepositories()
+        await self.memory.start()
+        self.mongo = MongoRepositories(AsyncMongoMockClient()["memory_store_test"])
+        for project in make_projects():
+            await self.memory.projects.insert(project)
+            await self.mongo.projects.insert(dict(project))
+
+    async def walk(self, repositories, query, sort):
+        """Every page of a list, following the cursors; pages are returned as lists of ids"""
+        pages, cursor = [], None
+        while True:
+            docs, cursor = await repositories.projects.page(
+                query, 2, cursor, sort, {"_id": 0, "id": 1, "created_at": 1}
+            )
+            pages.append([doc["id"] for doc in docs])
+            if cursor is None:
+                return pages
+
+    async def test_pages_and_cursors_match(self):
+        for query in ({"user_id": "u1"}, {"user_id": "u1", "challenge_id": "c1"}, {"user_id": "nobody"}):
+            for sort in ListSort:
+                with self.subTest(query=query, sort=sort):
+                    self.assertEqual(
+                        await self.walk(self.memory, query, sort), await self.walk(self.mongo, query, sort)
+                    )
+
+    async def test_recent_matches(self):
+        self.assertEqual(
+            [doc["id"] for doc in await self.memory.projects.recent("u1", 4)],
+            [doc["id"] for doc in await self.mongo.projects.recent("u1", 4)]
+        )
+
+    async def test_stale_for_url_check_matches(self):
+        cutoff = BASE_TIME + timedelta(hours=6)
+        for limit in (3, 100):
+            with self.subTest(limit=limit):
+                self.assertEqual(
+                    [doc["id"] for doc in await self.memory.projects.stale_for_url_check(cutoff, limit)],
+                    [doc["id"] for doc in await self.mongo.projects.stale_for_url_check(cutoff, limit)]
+                )
+
+        # A checked project leaves the stale set; one that loses its URL is no longer checked
+        for repositories in (self.memory, self.mongo):
+            await repositories.projects.set_url_statuses([("p01", {})], cutoff)
+            await repositories.projects.update("p03", "u1", {"repository_url": None})
+        self.assertEqual(
+            [doc["id"] for doc in await self.memory.projects.stale_for_url_check(cutoff, 100)],
+            [doc["id"] for doc in await self.mongo.projects.stale_for_url_check(cutoff, 100)]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""The projects:batch endpoints report bad items without failing the batch
+
+See conftest.py for the in-process app set-up.
+"""
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tests.conftest import AppTestCase, server  # noqa: E402
+
+
+class ProjectBatchTests(AppTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        response = await self.client.post(
+            "/api/challenges", headers=self.headers, json={"title": "Batch", "description": "Batch updates"}
+        )
+        self.batch_path = f"/api/challenges/{response.json()['id']}/projects:batch"
+        response = await self.client.post(
+            self.batch_path, headers=self.headers, json=[{"title": "One", "description": ""}]
+        )
+        self.project_id = response.json()["projects"][0]["id"]
+
+    async def test_invalid_ids_are_per_item_errors(self):
+        response = await self.client.put(self.batch_path, headers=self.headers, json=[
+            {"id": 5, "title": "Numeric id"},
+            {"title": "No id"},
+            {"id": self.project_id, "title": "Renamed"},
+        ])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([(e["index"], e["id"]) for e in body["errors"]], [(0, "5"), (1, None)])
+        self.assertEqual([p["title"] for p in body["projects"]], ["Renamed"])
+
+    async def test_projects_of_other_challenges_are_not_found(self):
+        response = await self.client.post(
+            "/api/challenges", headers=self.headers, json={"title": "Other", "description": ""}
+        )
+        other_path = f"/api/challenges/{response.json()['id']}/projects:batch"
+        response = await self.client.put(
+            other_path, headers=self.headers, json=[{"id": self.project_id, "title": "Moved"}]
+        )
+        self.assertEqual(response.json()["errors"][0]["error"], "Project not found")
+
+    async def test_stats_stay_exact_when_a_single_update_interleaves(self):
+        await server.user_stats.get(self.user_id)
+        original_update = server.repositories.projects.update
+        interleaved = False
+
+        async def update_after_a_single_put(*args):
+            nonlocal interleaved
+            if not interleaved:
+                interleaved = True
+                response = await self.client.put(
+                    f"/api/projects/{self.project_id}", headers=self.headers, json={"status": "completed"}
+                )
+                self.assertEqual(response.status_code, 200)
+            return await original_update(*args)
+
+        with mock.patch.object(server.repositories.projects, "update", update_after_a_single_put):
+            response = await self.client.put(
+                self.batch_path, headers=self.headers, json=[{"id": self.project_id, "status": "in_progress"}]
+            )
+        self.assertEqual(response.json()["projects"][0]["status"], "in_progress")
+
+        maintained = await server.user_stats.get(self.user_id)
+        await server.user_stats.rebuild(self.user_id)
+        rebuilt = await server.user_stats.get(self.user_id)
+        self.assertEqual(maintained["projects"], rebuilt["projects"])
+        self.assertEqual(maintained["projects"]["completed"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""RedisCacheBackend and ResponseCache against a local RESP stand-in server"""
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from response_cache import RedisCacheBackend, ResponseCache  # noqa: E402
+
+
+class RespStandIn:
+    """Just enough of a Redis server for GET, SET [EX] and DEL"""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+        self.connections = 0
+        self.port = None
+        self._server = None
+
+    async def start(self, port: int = 0):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _read_command(self, reader):
+        header = await reader.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                self.commands.append(args)
+                name = args[0].upper()
+                if name == b"GET":
+                    value = self.data.get(args[1])
+                    writer.write(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+                elif name == b"SET":
+                    self.data[args[1]] = args[2]
+                    writer.write(b"+OK\r\n")
+                elif name == b"DEL":
+                    removed = sum(self.data.pop(key, None) is not None for key in args[1:])
+                    writer.write(b":%d\r\n" % removed)
+                else:
+                    writer.write(b"-ERR unknown command\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+class RedisCacheBackendTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = RespStandIn()
+        await self.server.start()
+        self.backend = RedisCacheBackend(f"redis://127.0.0.1:{self.server.port}/0", timeout=0.5, retry_after=0.2)
+
+    async def asyncTearDown(self):
+        await self.backend.close()
+        await self.server.stop()
+
+    async def test_get_set_delete(self):
+        self.assertIsNone(await self.backend.get("missing"))
+        await self.backend.set("key", b"binary\r\nvalue", ttl=30.5)
+        self.assertEqual(await self.backend.get("key"), b"binary\r\nvalue")
+        self.assertEqual(self.server.commands[1], [b"SET", b"key", b"binary\r\nvalue", b"EX", b"30"])
+
+        await self.backend.delete("key", "other")
+        self.assertIsNone(await self.backend.get("key"))
+        self.assertEqual(self.server.commands[3], [b"DEL", b"key", b"other"])
+
+    async def test_connections_are_pooled(self):
+        for i in range(20):
+            await self.backend.set(f"key{i}", b"v", ttl=10)
+        self.assertLessEqual(self.server.connections, 4)
+
+    async def test_error_reply_is_a_miss(self):
+        with self.assertLogs("response_cache", "WARNING"):
+            self.assertIsNone(await self.backend._execute_quietly("BOGUS"))
+
+    async def test_response_cache_checks_etag(self):
+        cache = ResponseCache(self.backend, ttl=60, prefix="dashboard:")
+        await cache.set("user-1", '"etag-a"', b'{"stats": 1}')
+
+        self.assertEqual(await cache.get("user-1", '"etag-a"'), b'{"stats": 1}')
+        self.assertIsNone(await cache.get("user-1", '"etag-b"'))
+        self.assertIn(b"dashboard:user-1", self.server.data)
+
+        await cache.invalidate("user-1")
+        self.assertIsNone(await cache.get("user-1", '"etag-a"'))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stale"]), (1, 2, 1))
+
+    async def test_unreachable_server_backs_off_then_recovers(self):
+        port = self.server.port
+        await self.server.stop()
+        cache = ResponseCache(self.backend, ttl=60)
+
+        with self.assertLogs("response_cache", "WARNING"):
+            self.assertIsNone(await cache.get("user-1", '"etag"'))
+        self.assertEqual(self.backend.failures, 1)
+
+        # Within the backoff nothing waits on the network
+        started = time.perf_counter()
+        await cache.set("user-1", '"etag"', b"body")
+        await cache.invalidate("user-1")
+        self.assertIsNone(await cache.get("user-1", '"etag"'))
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertEqual((self.backend.failures, self.backend.skipped), (1, 3))
+
+        self.server = RespStandIn()
+        await self.server.start(port)
+        await asyncio.sleep(0.25)
+        await cache.set("user-1", '"etag"', b"body")
+        self.assertEqual(await cache.get("user-1", '"etag"'), b"body")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,6 +13,29 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from tests.backend_test import BackendTests
 from tests.frontend_test import FrontendTests
 from tests.integration_test import IntegrationTests
+from tests.auth_profile_test import AuthProfileTests
+from tests.dashboard_consistency_test import DashboardConsistencyTests
+from tests.memory_store_test import MemoryMongoParityTests, MemoryStoreReplayTests
+from tests.project_batch_test import ProjectBatchTests
+from tests.response_cache_test import RedisCacheBackendTests
+from tests.session_revocation_test import SessionRevocationTests
+from tests.url_monitor_test import URLMonitorTests
+from tests.url_sweeper_test import URLSweeperTests
+from tests.user_stats_test import UserStatsTests
+
+# Run the app in this process on the memory storage engine; no servers needed
+IN_PROCESS_TESTS = [
+    AuthProfileTests,
+    DashboardConsistencyTests,
+    MemoryMongoParityTests,
+    MemoryStoreReplayTests,
+    ProjectBatchTests,
+    RedisCacheBackendTests,
+    SessionRevocationTests,
+    URLMonitorTests,
+    URLSweeperTests,
+    UserStatsTests,
+]
 
 def run_tests(test_type=None, verbose=False):
     """Run the specified tests"""
@@ -29,6 +52,10 @@ def run_tests(test_type=None, verbose=False):
     if test_type == 'integration' or test_type is None:
         test_suite.addTest(unittest.makeSuite(IntegrationTests))
     
+    if test_type == 'inprocess' or test_type is None:
+        for test_case in IN_PROCESS_TESTS:
+            test_suite.addTest(unittest.makeSuite(test_case))
+    
     # Run tests
     verbosity = 2 if verbose else 1
     runner = unittest.TextTestRunner(verbosity=verbosity)
@@ -79,7 +106,7 @@ def run_tests(test_type=None, verbose=False):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Run Challenge Tracker Platform tests')
-    parser.add_argument('--type', choices=['backend', 'frontend', 'integration'], 
+    parser.add_argument('--type', choices=['backend', 'frontend', 'integration', 'inprocess'], 
                         help='Type of tests to run (default: all)')
     parser.add_argument('--verbose', action='store_true', help='Verbose output')
     
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""A logout on another instance reaches this instance's session cache
+
+See conftest.py for the in-process app set-up.
+"""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from tests.conftest import AppTestCase, server  # noqa: E402
+
+
+class SessionRevocationTests(AppTestCase):
+    async def test_cached_session_is_dropped_after_remote_logout(self):
+        response = await self.client.get("/api/challenges", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(server.session_cache.get(self.token))
+
+        # What a logout handled by another instance leaves behind in the shared store
+        await server.repositories.sessions.delete(self.token)
+        await server.repositories.revocations.add(self.session_id, datetime.utcnow() + timedelta(minutes=5))
+        await server.revoked_sessions.refresh()
+
+        response = await self.client.get("/api/challenges", headers=self.headers)
+        self.assertEqual(response.status_code, 401)
+        self.assertIsNone(server.session_cache.get(self.token))
+
+    async def test_logout_revokes_the_session(self):
+        response = await self.client.post("/api/auth/logout", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.session_id, server.revoked_sessions)
+        self.assertIn(self.session_id, await server.repositories.revocations.active(datetime.utcnow()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""URLMonitor's HEAD-first probing against a local aiohttp server"""
+import os
+import sys
+import unittest
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from url_monitor import URLMonitor  # noqa: E402
+
+
+class URLMonitorTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.get_status = 200
+        self.methods = []
+
+        async def handler(request):
+            self.methods.append(request.method)
+            if request.method == "HEAD":
+                return web.Response(status=405)
+            return web.Response(status=self.get_status, text="page")
+
+        app = web.Application()
+        app.router.add_route("*", "/", handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+        self.monitor = URLMonitor()
+
+    async def asyncTearDown(self):
+        await self.monitor.close()
+        await self.runner.cleanup()
+
+    async def test_failed_get_fallback_keeps_probing_with_head(self):
+        self.get_status = 503
+        result = await self.monitor.check_url_status(self.url)
+        self.assertEqual((result["status_code"], result["method"]), (503, "HEAD"))
+
+        self.get_status = 200
+        result = await self.monitor.check_url_status(self.url, result)
+        self.assertEqual((result["status_code"], result["method"]), (200, "GET"))
+
+        self.methods.clear()
+        await self.monitor.check_url_status(self.url, result)
+        self.assertEqual(self.methods, ["GET"])
+
+
+if __name__ == "__main__":
+    unittest.main()
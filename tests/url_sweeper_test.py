@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""URLSweeper re-checks on the memory storage engine"""
+import os
+import sys
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from memory_store import MemoryRepositories  # noqa: E402
+from url_monitor import URLMonitor, URLSweeper  # noqa: E402
+
+
+class URLSweeperTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.repositories = MemoryRepositories()
+        await self.repositories.start()
+        self.monitor = URLMonitor()
+        self.sweeper = URLSweeper(self.repositories.projects, self.monitor)
+
+    async def asyncTearDown(self):
+        await self.monitor.close()
+        await self.repositories.close()
+
+    async def test_recheck_clears_status_of_removed_urls(self):
+        checked_at = datetime(2024, 1, 1)
+        await self.repositories.projects.insert({
+            "id": "p1", "user_id": "u1", "challenge_id": "c1", "title": "Project", "description": "",
+            "repository_url": "", "demo_url": None, "created_at": checked_at, "last_url_check": checked_at,
+            "url_status": {"repository": {"url": "https://old.example.com", "status_code": 200, "accessible": True}},
+        })
+
+        await self.sweeper.check_project_ids(["p1", "missing"])
+
+        project = await self.repositories.projects.get("p1", "u1")
+        self.assertEqual(project["url_status"], {})
+        self.assertGreater(project["last_url_check"], checked_at)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""UserStats keeps increments that race its rebuilds, against mongomock"""
+import os
+import sys
+import unittest
+import uuid
+from datetime import datetime
+
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from user_stats import UserStats, challenge_counters  # noqa: E402
+
+
+class UserStatsTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db = AsyncMongoMockClient()["user_stats_test"]
+        self.stats = UserStats(self.db)
+        self.user_id = str(uuid.uuid4())
+
+    async def create_challenge(self, user_id=None):
+        """What the create route does: write the challenge, then its increments"""
+        challenge = {"id": str(uuid.uuid4()), "user_id": user_id or self.user_id, "status": "active",
+                     "created_at": datetime.utcnow()}
+        await self.db.challenges.insert_one(dict(challenge))
+        await self.stats.apply(challenge["user_id"], challenge_counters(None), challenge_counters(challenge))
+
+    def interleave_once(self, write):
+        """Run write during the next aggregation, as a request landing mid-rebuild would"""
+        original_aggregate = self.stats._aggregate
+
+        async def aggregate(*args):
+            self.stats._aggregate = original_aggregate
+            stats = await original_aggregate(*args)
+            await write()
+            return stats
+
+        self.stats._aggregate = aggregate
+
+    async def test_write_during_first_read_is_counted(self):
+        await self.create_challenge()
+        self.interleave_once(self.create_challenge)
+
+        self.assertEqual((await self.stats.get(self.user_id))["challenges"]["total"], 2)
+        self.assertEqual((await self.stats.get(self.user_id))["challenges"]["total"], 2)
+
+    async def test_write_before_first_read_is_rebuilt(self):
+        await self.create_challenge()
+        self.assertTrue((await self.db.user_stats.find_one({"user_id": self.user_id}))["partial"])
+
+        stats = await self.stats.get(self.user_id)
+        self.assertEqual(stats["challenges"]["total"], 1)
+        self.assertNotIn("partial", await self.db.user_stats.find_one({"user_id": self.user_id}))
+
+    async def test_write_during_full_rebuild_is_kept(self):
+        other_user_id = str(uuid.uuid4())
+        await self.create_challenge()
+        await self.create_challenge(other_user_id)
+        await self.stats.get(self.user_id)
+        self.interleave_once(self.create_challenge)
+
+        self.assertEqual(await self.stats.rebuild(), sorted([self.user_id, other_user_id]))
+        self.assertEqual((await self.stats.get(self.user_id))["challenges"]["total"], 2)
+        self.assertEqual((await self.stats.get(other_user_id))["challenges"]["total"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()